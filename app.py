@@ -1,1714 +1,1982 @@
-import os
-from pathlib import Path
-from functools import wraps
-
-from flask import Flask, jsonify, render_template, request, redirect, url_for, flash, session, abort
-from flask_login import LoginManager, UserMixin
-from werkzeug.security import check_password_hash
-from sqlalchemy import cast, literal, distinct, desc, exists, select, func, case, and_, or_
-from sqlalchemy.orm import aliased
-from sqlalchemy.dialects.postgresql import aggregate_order_by
-from db import SessionLocal
-from models import (
-    Edition, EditionSociety, Society,
-    Round, Debate, DebatePosition, Speech,
-    EditionMember, Person, User, DebateJudge,
-    SocietyAccount, MemberKindEnum, JudgeRoleEnum
-)
-from consts import MAX_DEBATES_PER_SPEAKER
-
-BASE_DIR = Path(__file__).resolve().parent
-
-app = Flask(
-    __name__,
-    template_folder=str(BASE_DIR / "templates"),
-    static_folder=str(BASE_DIR / "static"),
-    static_url_path="/static",
-)
-app.config.update(
-    SESSION_COOKIE_HTTPONLY=True,
-    SESSION_COOKIE_SAMESITE="Lax",
-    # prod:
-    SESSION_COOKIE_SECURE=True
-)
-app.secret_key = os.environ.get("SECRET_KEY", "dev-unsafe")
-
-# -------- Flask-Login --------
-login_manager = LoginManager(app)
-login_manager.login_view = "login"
-
-ORDER_POS = case(
-    (DebatePosition.position == "OG", 1),
-    (DebatePosition.position == "OO", 2),
-    (DebatePosition.position == "CG", 3),
-    (DebatePosition.position == "CO", 4),
-    else_=99,
-)
-ORDER_POS_SPEECH = case(
-    (Speech.position == "OG", 1),
-    (Speech.position == "OO", 2),
-    (Speech.position == "CG", 3),
-    (Speech.position == "CO", 4),
-    else_=99,
-)
-
-
-def society_required(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        if session.get("auth_kind") != "society" or not session.get("soc_acc_id"):
-            return redirect(url_for("login", next=request.path))
-        return f(*args, **kwargs)
-    return wrapper
-
-def _next_round_without_results(sess, edition_id: int):
-    # subconsulta correlacionada: existe algum speech com score na rodada?
-    any_scored = (
-        select(literal(1))
-        .select_from(Speech)
-        .join(Debate, Debate.id == Speech.debate_id)
-        .where(
-            Debate.round_id == Round.id,     # correlaciona com Round externo
-            Speech.score.is_not(None),
-        )
-        .limit(1)
-    )
-
-    row = sess.execute(
-        select(
-            Round.id,
-            Round.number,
-            Round.name,
-            Round.scheduled_date,
-        )
-        .where(
-            Round.edition_id == edition_id,
-            ~exists(any_scored)              # NÃO existe score lançado
-        )
-        .order_by(Round.number.asc(), Round.id.asc())
-        .limit(1)
-    ).first()
-
-    if not row:
-        return None
-    r_id, r_num, r_name, r_date = row
-    return {"id": r_id, "number": r_num, "name": r_name, "date": r_date}
-
-def _get_soc_context(sess):
-    """Retorna (edition_society, edition_id, base_society_id) da conta logada de sociedade."""
-    soc_acc_id = session.get("soc_acc_id")
-    edsoc_id = session.get("edition_society_id")
-    if not soc_acc_id or not edsoc_id:
-        return None, None, None
-    edsoc = sess.get(EditionSociety, edsoc_id)
-    if not edsoc:
-        return None, None, None
-    return edsoc, edsoc.edition_id, edsoc.society_id
-
-
-def _debates_of_round_for_soc(sess, round_id: int, edition_society_id: int):
-    rows = sess.execute(
-        select(
-            Debate.id.label("debate_id"),
-            Debate.number_in_round.label("number_in_round"),
-            DebatePosition.position.label("position"),
-            # locked = existe algum score não-nulo nesse slot (posição do nosso time)
-            func.bool_or(Speech.score.is_not(None)).label("locked"),
-            # lineup ordenado por seq: [{id, name, seq, score}, ...]
-            func.json_agg(
-                aggregate_order_by(
-                    func.json_build_object(
-                        literal("id"), EditionMember.id,
-                        literal("name"), Person.full_name,
-                        literal("seq"), Speech.sequence_in_team,
-                        literal("score"), Speech.score,
-                    ),
-                    Speech.sequence_in_team.asc(),
-                )
-            ).label("lineup_json"),
-        )
-        .select_from(DebatePosition)
-        .join(Debate, Debate.id == DebatePosition.debate_id)
-        .outerjoin(
-            Speech,
-            (Speech.debate_id == Debate.id) &
-            (Speech.position == DebatePosition.position)
-        )
-        .outerjoin(EditionMember, EditionMember.id == Speech.edition_member_id)
-        .outerjoin(Person, Person.id == EditionMember.person_id)
-        .where(
-            Debate.round_id == round_id,
-            DebatePosition.edition_society_id == edition_society_id,
-        )
-        .group_by(Debate.id, Debate.number_in_round, DebatePosition.position)
-        .order_by(Debate.number_in_round.asc(), DebatePosition.position.asc())
-    ).all()
-
-    out = []
-    for d_id, num, pos, locked, lineup_json in rows:
-        s1 = s2 = None
-        if lineup_json:
-            # lineup_json já vem ordenado por seq
-            if len(lineup_json) >= 1:
-                s1 = {"id": lineup_json[0]["id"], "name": lineup_json[0]["name"]}
-            if len(lineup_json) >= 2:
-                s2 = {"id": lineup_json[1]["id"], "name": lineup_json[1]["name"]}
-        out.append({
-            "debate_id": d_id,
-            "number_in_round": num,
-            "position": pos,
-            "s1": s1,
-            "s2": s2,
-            "locked": bool(locked),
-        })
-    return out
-# lista de debatedores ELEGÍVEIS (< MAX_DEBATES_PER_SPEAKER usos em rodadas anteriores) para a próxima rodada
-def _eligible_debaters_for_next_round(sess, edition_id: int, base_society_id: int, next_round_number: int):
-    EM = aliased(EditionMember)
-
-    # conta debates distintos (onde houve pelo menos uma speech com score != NULL)
-    used_count = func.count(
-        distinct(Speech.debate_id)
-    ).filter(
-        (Speech.score.is_not(None)) &
-        (Round.edition_id == edition_id) &
-        (Round.number < next_round_number)
-    ).label("used_count")
-
-    rows = sess.execute(
-        select(
-            EM.id,
-            Person.full_name,
-            used_count,
-        )
-        .select_from(EM)
-        .join(Person, Person.id == EM.person_id)
-        .outerjoin(Speech, Speech.edition_member_id == EM.id)
-        .outerjoin(Debate, Debate.id == Speech.debate_id)
-        .outerjoin(Round, Round.id == Debate.round_id)
-        .where(
-            EM.edition_id == edition_id,
-            EM.kind == cast(literal("debater"), MemberKindEnum),  # enum OK
-            Person.society_id == base_society_id,
-        )
-        .group_by(EM.id, Person.full_name)
-        .order_by(Person.full_name.asc())
-    ).all()
-
-    return [{"id": mid, "name": name} for (mid, name, used) in rows if int(used or 0) < MAX_DEBATES_PER_SPEAKER]
-
-
-
-@app.get("/health-check")
-def health_check():
-    return "ok"
-
-# ---------- Página: Escalação (sociedade) ----------
-@app.get("/soc/escalacao")
-@society_required
-def page_escalacao():
-    sess = SessionLocal()
-    try:
-        edsoc, edition_id, base_soc_id = _get_soc_context(sess)
-        if not edsoc:
-            return redirect(url_for("login"))
-        next_round = _next_round_without_results(sess, edition_id)
-        if not next_round:
-            # não há rodada aberta para escalação
-            return render_template("escalacao.html",
-                                   next_round=None, debates=[], debaters=[])
-
-        debates = _debates_of_round_for_soc(sess, next_round["id"], edsoc.id)
-        debaters = _eligible_debaters_for_next_round(sess, edition_id, base_soc_id, next_round["number"])
-
-        return render_template("escalacao.html",
-                               next_round=next_round,
-                               debates=debates,
-                               debaters=debaters)
-    finally:
-        sess.close()
-
-
-@app.get("/sociedade/<int:edsoc_id>")
-def view_society_history(edsoc_id: int):
-    return ""
-    sess = SessionLocal()
-    EM2 = aliased(EditionMember)
-    try:
-        # 0) EditionSociety + Society nomes (uma ida só)
-        edsoc_row = sess.execute(
-            select(
-                EditionSociety.id,
-                EditionSociety.edition_id,
-                EditionSociety.society_id,
-                Society.short_name,
-                Society.name
-            ).join(Society, Society.id == EditionSociety.society_id
-            ).where(EditionSociety.id == edsoc_id)
-        ).first()
-
-        if not edsoc_row:
-            abort(404)
-
-        _, edition_id, society_id, short_name, full_name = edsoc_row
-
-        # 1) Debatedores da sociedade na edição + contagem de usos (scores não-nulos)
-        #    LEFT JOIN em Speech/Debate/Round permite "0" usos naturalmente
-        used_count = func.count(distinct(Speech.debate_id)).filter(
-            Speech.score.is_not(None)
-        ).label("used_count")
-
-        deb_rows = sess.execute(
-            select(
-                EM2.id.label("member_id"),
-                Person.full_name,
-                used_count,
-            )
-            .join(Person, Person.id == EM2.person_id)
-            .outerjoin(Speech, Speech.edition_member_id == EM2.id)
-            .outerjoin(Debate, Debate.id == Speech.debate_id)
-            .outerjoin(Round, Round.id == Debate.round_id)
-            .where(
-                EM2.edition_id == edition_id,
-                EM2.kind == cast(literal("debater"), MemberKindEnum),
-                Person.society_id == society_id,
-                # restringe à edição, mas preserva quem nunca falou (Round NULL)
-                (Round.edition_id == edition_id) | (Round.id.is_(None)),
-            )
-            .group_by(EM2.id, Person.full_name)
-            .order_by(desc(used_count))
-        ).all()
-
-        debaters_table = [
-            {"id": mid, "name": name, "times": int(used or 0)}
-            for (mid, name, used) in deb_rows
-        ]
-
-        # 2) HISTÓRICO em uma query com CTEs (debates, rank, mapas e speakers)
-        # our_debates: debates da sociedade na edição corrente
-        our_debates = (
-            select(
-                Round.id.label("round_id"),
-                Round.number.label("round_number"),
-                Round.name.label("round_name"),
-                Round.scheduled_date.label("round_date"),
-                Round.scores_published.label("scores_published"),
-                Round.silent.label("silent"),
-                Debate.id.label("debate_id"),
-                Debate.number_in_round.label("debate_number"),
-                DebatePosition.position.label("our_position"),
-            )
-            .join(Debate, Debate.round_id == Round.id)
-            .join(DebatePosition, DebatePosition.debate_id == Debate.id)
-            .where(
-                Round.edition_id == edition_id,
-                DebatePosition.edition_society_id == edsoc_id,
-            )
-            .cte("our_debates")
-        )
-
-        # team_scores: soma por (debate, equipe) quando houver 2 discursos com nota
-        # mapeia equipe via DebatePosition (por posição), garantindo edição/silent já filtrados no join de Round
-        team_scores = (
-            select(
-                Speech.debate_id.label("debate_id"),
-                DebatePosition.edition_society_id.label("es_id"),
-                func.sum(Speech.score).label("team_total"),
-                func.count(Speech.id).label("speech_count"),
-            )
-            .join(Debate, Debate.id == Speech.debate_id)
-            .join(Round, Round.id == Debate.round_id)
-            .join(
-                DebatePosition,
-                and_(
-                    DebatePosition.debate_id == Speech.debate_id,
-                    DebatePosition.position == Speech.position,
-                ),
-            )
-            .where(
-                Round.edition_id == edition_id,
-                Speech.score.is_not(None),
-            )
-            .group_by(Speech.debate_id, DebatePosition.edition_society_id)
-            .having(func.count(Speech.id) == 2)  # exige 2 discursos com nota
-            .cte("team_scores")
-        )
-
-        # ranked: rank por debate (3/2/1/0 será mapeado depois)
-        ranked = (
-            select(
-                team_scores.c.debate_id,
-                team_scores.c.es_id,
-                team_scores.c.team_total,
-                func.rank().over(
-                    partition_by=team_scores.c.debate_id,
-                    order_by=team_scores.c.team_total.desc(),
-                ).label("rnk"),
-            )
-        ).cte("ranked")
-
-        # our_rank: rank/points do nosso time em cada debate (LEFT JOIN para casos sem 2 falas)
-        points_expr = case(
-            (ranked.c.rnk == 1, literal(3)),
-            (ranked.c.rnk == 2, literal(2)),
-            (ranked.c.rnk == 3, literal(1)),
-            else_=literal(0),
-        )
-
-        our_rank = (
-            select(
-                ranked.c.debate_id,
-                ranked.c.rnk,
-                points_expr.label("points"),
-                ranked.c.team_total.label("our_total"),
-            )
-            .where(ranked.c.es_id == edsoc_id)
-        ).cte("our_rank")
-
-        # teams_map: por debate, position->short_name (todas as equipes do debate)
-        teams_map = (
-            select(
-                DebatePosition.debate_id.label("debate_id"),
-                func.jsonb_object_agg(
-                    DebatePosition.position,
-                    Society.short_name
-                ).label("teams_json")
-            )
-            .select_from(DebatePosition)  # <-- define o FROM
-            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
-            .join(Society, Society.id == EditionSociety.society_id)
-            .group_by(DebatePosition.debate_id)
-        ).cte("teams_map")
-
-        # totals_map: por debate, position->total (somente quando time tem 2 falas)
-        totals_map = (
-            select(
-                DebatePosition.debate_id.label("debate_id"),
-                func.jsonb_object_agg(
-                    DebatePosition.position,
-                    team_scores.c.team_total
-                ).label("totals_json")
-            )
-            .select_from(DebatePosition)  # <-- define o FROM
-            .join(
-                team_scores,
-                DebatePosition.edition_society_id == team_scores.c.es_id
-            )
-            .group_by(DebatePosition.debate_id)
-        ).cte("totals_map")
-
-        # our_speakers: nomes + score, ordenados por sequence_in_team (sempre retornamos nomes; score pode ser NULL)
-        our_speakers = (
-            select(
-                Speech.debate_id.label("debate_id"),
-                func.json_agg(
-                    aggregate_order_by(
-                        func.json_build_object(
-                            literal("name"), Person.full_name,
-                            literal("score"), Speech.score,
-                        ),
-                        Speech.sequence_in_team.asc(),  # <— ordena dentro do json_agg
-                    )
-                ).label("speakers_json")
-            )
-            .select_from(Speech)  # define FROM explícito p/ evitar ambiguidade no JOIN
-            .join(EditionMember, EditionMember.id == Speech.edition_member_id)
-            .join(Person, Person.id == EditionMember.person_id)
-            .join(
-                DebatePosition,
-                and_(
-                    DebatePosition.debate_id == Speech.debate_id,
-                    DebatePosition.position == Speech.position,
-                )
-            )
-            .where(DebatePosition.edition_society_id == edsoc_id)
-            .group_by(Speech.debate_id)
-        ).cte("our_speakers")
-
-        # SELECT final: uma linha por debate nosso, com mapas JSON prontos
-        history_rows = sess.execute(
-            select(
-                our_debates.c.round_id,
-                our_debates.c.round_number,
-                our_debates.c.round_name,
-                our_debates.c.round_date,
-                our_debates.c.scores_published,
-                our_debates.c.silent,
-                our_debates.c.debate_id,
-                our_debates.c.debate_number,
-                our_debates.c.our_position,
-
-                our_rank.c.rnk,
-                our_rank.c.points,
-                our_rank.c.our_total,
-
-                teams_map.c.teams_json,
-                totals_map.c.totals_json,
-                our_speakers.c.speakers_json,
-            )
-            .join(our_rank, our_rank.c.debate_id == our_debates.c.debate_id, isouter=True)
-            .join(teams_map, teams_map.c.debate_id == our_debates.c.debate_id, isouter=True)
-            .join(totals_map, totals_map.c.debate_id == our_debates.c.debate_id, isouter=True)
-            .join(our_speakers, our_speakers.c.debate_id == our_debates.c.debate_id, isouter=True)
-            .order_by(our_debates.c.round_number.asc(), our_debates.c.debate_number.asc())
-        ).all()
-
-        # Montagem final (aplica regra de exibição de totals somente quando published)
-        history = []
-        for (round_id, rnum, rname, rdate, published, silent,
-             debate_id, dnum, our_pos, rnk, pts, our_total,
-             teams_json, totals_json, speakers_json) in history_rows:
-
-            # se não publicados, não exibimos totals (mas mantemos structure vazia)
-            totals_map_py = totals_json if published else None
-
-            history.append({
-                "round_id": round_id,
-                "round_number": rnum,
-                "round_name": rname,
-                "round_date": rdate,
-                "scores_published": bool(published),
-                "silent": bool(silent),
-                "debate_id": debate_id,
-                "deb_number": dnum,
-                "position": our_pos,
-                "rank": int(rnk) if rnk is not None else None,
-                "points": int(pts) if pts is not None else None,
-                "totals": totals_map_py,           # dict position->total, ou None se não publicado
-                "teams": teams_json or {},         # dict position->short_name
-                "our_speakers": speakers_json or []  # [{name, score}], score pode ser NULL
-            })
-
-        return render_template(
-            "society_history.html",
-            society={"short": short_name, "full": full_name},
-            debaters=debaters_table,
-            history=history
-        )
-
-    finally:
-        sess.close()
-
-
-
-@app.post("/soc/escalacao")
-@society_required
-def post_escalacao():
-    """Salva/atualiza escalação (2 debatedores) para o debate/posição da sociedade.
-       Regras:
-       - debate/posição devem pertencer à sociedade logada;
-       - debatedores devem ser EditionMember(kind='debater') da MESMA sociedade/edição;
-       - não pode escolher a mesma pessoa pros dois slots;
-       - se já houver score (resultado lançado) naquele debate/posição, BLOQUEIA edição.
-    """
-    data = request.form or request.json or {}
-    debate_id = int(data.get("debate_id", 0))
-    s1_id = int(data.get("s1_id", 0))
-    s2_id = int(data.get("s2_id", 0))
-
-    if not debate_id or not s1_id or not s2_id:
-        flash("Preencha os dois debatedores.", "error")
-        return redirect(request.referrer or url_for("page_escalacao"))
-
-    if s1_id == s2_id:
-        flash("Os dois debatedores devem ser pessoas diferentes.", "error")
-        return redirect(request.referrer or url_for("page_escalacao"))
-
-    sess = SessionLocal()
-    try:
-        edsoc, edition_id, base_soc_id = _get_soc_context(sess)
-        if not edsoc:
-            return redirect(url_for("login"))
-
-        # Verifica que o debate pertence à mesma edição e contém a sociedade (descobre a posição)
-        pos_row = sess.execute(
-            select(DebatePosition.position, Debate.round_id)
-            .join(Debate, Debate.id == DebatePosition.debate_id)
-            .where(
-                DebatePosition.debate_id == debate_id,
-                DebatePosition.edition_society_id == edsoc.id
-            )
-        ).first()
-        if not pos_row:
-            flash("Você não possui permissão para este debate.", "error")
-            return redirect(request.referrer or url_for("page_escalacao"))
-        position, round_id = pos_row
-
-        # Upsert da escalação (cria/atualiza os dois slots com score=NULL)
-        slots = {
-            1: s1_id,
-            2: s2_id,
-        }
-        existing = sess.execute(
-            select(Speech.id, Speech.sequence_in_team)
-            .where(Speech.debate_id == debate_id, Speech.position == position)
-        ).all()
-        existing_by_seq = {seq: sid for (sid, seq) in existing}
-
-        for seq, member_id in slots.items():
-            if seq in existing_by_seq:
-                # update
-                sp = sess.get(Speech, existing_by_seq[seq])
-                sp.edition_member_id = member_id
-                sp.score = None
-            else:
-                # insert
-                sess.add(Speech(
-                    debate_id=debate_id,
-                    position=position,
-                    sequence_in_team=seq,
-                    edition_member_id=member_id,
-                    score=None
-                ))
-        sess.commit()
-        flash("Escalação salva com sucesso.", "success")
-        # redireciona mantendo a rodada atual
-        return redirect(url_for("home"))
-    finally:
-        sess.close()
-
-
-@app.get("/pairings")
-def view_pairings():
-    sess = SessionLocal()
-    try:
-        edition = get_current_edition(sess)
-        if not edition:
-            return render_template("pairings.html", rounds=[])
-
-        # Rodadas sem nenhum resultado (nenhuma Speech em nenhum debate da rodada)
-        scores_filled = func.sum(
-            case((Speech.score.isnot(None), 1), else_=0)
-        )
-        rows = sess.execute(
-            select(
-                Round.id, Round.number, Round.name, Round.scheduled_date,
-                func.count(Speech.id).label("sp_total"),
-                func.count(distinct(Debate.id)).label("deb_count"),
-            )
-            .join(Debate, Debate.round_id == Round.id, isouter=True)
-            .join(Speech, Speech.debate_id == Debate.id, isouter=True)
-            .where(Round.edition_id == edition.id)
-            .group_by(Round.id)
-            .having(scores_filled == 0)
-            .having(func.count(distinct(Debate.id)) > 0)
-            .order_by(Round.number.asc())
-        ).all()
-        round_ids = [r_id for (r_id, *_rest) in rows]
-
-        # Posições de todos os debates dessas rodadas
-        pos_rows = []
-        if round_ids:
-            pos_rows = sess.execute(
-                select(
-                    Round.id.label("round_id"),
-                    Round.number.label("round_number"),
-                    Round.scheduled_date,
-                    Debate.id.label("debate_id"),
-                    Debate.number_in_round,
-                    DebatePosition.position,
-                    Society.short_name,
-                )
-                .join(Debate, Debate.round_id == Round.id)
-                .join(DebatePosition, DebatePosition.debate_id == Debate.id)
-                .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
-                .join(Society, Society.id == EditionSociety.society_id)
-                .where(Round.id.in_(round_ids))
-                .order_by(Round.number.asc(), Debate.number_in_round.asc(), ORDER_POS.asc())
-            ).all()
-
-        # Agrupa para o template
-        by_round = {}
-        for (r_id, r_num, r_date, d_id, d_num, pos, short) in pos_rows:
-            by_round.setdefault(r_id, {
-                "id": r_id,
-                "number": r_num,
-                "date": r_date,  # pode ser None
-                "debates": {}
-            })
-            rd = by_round[r_id]
-            rd["debates"].setdefault(d_id, {"id": d_id, "number": d_num, "positions": []})
-            rd["debates"][d_id]["positions"].append({"position": pos, "short_name": short})
-
-        rounds = []
-        # rows garante ordem por Round.number
-        for (r_id, r_num, _r_name, r_date, _sp_total, _deb_count) in rows:
-            rd = by_round.get(r_id, {"id": r_id, "number": r_num, "date": r_date, "debates": {}})
-            debates = [rd["debates"][k] for k in sorted(rd["debates"], key=lambda x: rd["debates"][x]["number"])]
-            for d in debates:
-                d["positions"].sort(key=lambda x: {"OG":1,"OO":2,"CG":3,"CO":4}.get(x["position"], 99))
-            rounds.append({"id": r_id, "number": r_num, "date": r_date, "debates": debates})
-
-        return render_template("pairings.html", rounds=rounds)
-    finally:
-        sess.close()
-
-
-@app.get("/resultados")
-def view_results_list():
-    sess = SessionLocal()
-    try:
-        edition = get_current_edition(sess)
-        if not edition:
-            return render_template("results_list.html", rounds=[])
-
-        # 1) Rodadas completas, não-silent (1 query)
-        sp_scored = func.count(Speech.id).filter(Speech.score.is_not(None)).label("sp_scored")
-        deb_cnt = func.count(distinct(Debate.id)).label("deb_count")
-
-        r_rows = sess.execute(
-            select(
-                Round.id,
-                Round.number,
-                Round.name,
-                Round.scheduled_date,
-                Round.scores_published,
-                deb_cnt,
-                sp_scored,  # <- speeches com score != NULL
-            )
-            .join(Debate, Debate.round_id == Round.id, isouter=True)
-            .join(Speech, Speech.debate_id == Debate.id, isouter=True)
-            .where(Round.edition_id == edition.id, Round.silent.is_(False))
-            .group_by(Round.id)
-            .having(deb_cnt > 0)
-            .having(sp_scored == 8 * func.count(distinct(Debate.id)))
-            .order_by(Round.number.asc())
-        ).all()
-
-        round_ids = [r_id for (r_id, *_rest) in r_rows]
-        if not round_ids:
-            return render_template("results_list.html", rounds=[])
-
-        # Subquery: posições (sociedade por posição) agregadas por debate
-        positions_subq = (
-            select(
-                DebatePosition.debate_id.label("debate_id"),
-                func.json_agg(
-                    aggregate_order_by(
-                        func.json_build_object(
-                            literal("position"), DebatePosition.position,
-                            literal("short_name"), Society.short_name,
-                        ),
-                        ORDER_POS.asc(),
-                    )
-                ).label("positions_json"),
-            )
-            .select_from(DebatePosition)
-            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
-            .join(Society, Society.id == EditionSociety.society_id)
-            .group_by(DebatePosition.debate_id)
-        ).subquery()
-
-        # Subquery: speeches agregados por debate, ordenados por posição e seq
-        speeches_subq = (
-            select(
-                Speech.debate_id.label("debate_id"),
-                func.json_agg(
-                    aggregate_order_by(
-                        func.json_build_object(
-                            literal("position"), Speech.position,
-                            literal("seq"), Speech.sequence_in_team,
-                            literal("name"), Person.full_name,
-                            literal("score"), Speech.score,
-                        ),
-                        ORDER_POS_SPEECH.asc(),
-                        Speech.sequence_in_team.asc(),
-                    )
-                ).label("speeches_json"),
-            )
-            .select_from(Speech)
-            .join(EditionMember, EditionMember.id == Speech.edition_member_id)
-            .join(Person, Person.id == EditionMember.person_id)
-            .group_by(Speech.debate_id)
-        ).subquery()
-
-        # Subquery: juízes agregados por debate (chair + wings)
-        chair_role = cast(literal("chair"), JudgeRoleEnum)
-        wing_role = cast(literal("wing"), JudgeRoleEnum)
-        judge_string = func.concat(
-            func.trim(func.coalesce(Society.short_name, literal(""))),
-            literal(" — "),
-            Person.full_name,
-        )
-
-        judges_subq = (
-            select(
-                DebateJudge.debate_id.label("debate_id"),
-                # um chair por debate (string_agg com filtro; se houver mais de 1, concatena)
-                func.string_agg(judge_string, literal(", ")).filter(DebateJudge.role == chair_role).label("chair"),
-                # wings como array ordenada por nome
-                func.array_agg(
-                    aggregate_order_by(judge_string, Person.full_name.asc())
-                ).filter(DebateJudge.role == wing_role).label("wings"),
-            )
-            .select_from(DebateJudge)
-            .join(EditionMember, EditionMember.id == DebateJudge.edition_member_id)
-            .join(Person, Person.id == EditionMember.person_id)
-            .outerjoin(Society, Society.id == Person.society_id)
-            .group_by(DebateJudge.debate_id)
-        ).subquery()
-
-        # Subquery: totals por posição (somente quando há 2 falas com nota)
-        team_totals_subq = (
-            select(
-                DebatePosition.debate_id.label("debate_id"),
-                DebatePosition.position.label("position"),
-                func.sum(Speech.score).label("total"),
-            )
-            .select_from(Speech)
-            .join(Debate, Debate.id == Speech.debate_id)
-            .join(
-                DebatePosition,
-                (DebatePosition.debate_id == Speech.debate_id)
-                & (DebatePosition.position == Speech.position),
-            )
-            .where(Speech.score.is_not(None))
-            .group_by(DebatePosition.debate_id, DebatePosition.position)
-            .having(func.count(Speech.id) == 2)  # exige 2 falas com nota por posição
-        ).subquery()
-
-        # 2ª etapa: agrega em JSON por debate
-        totals_subq = (
-            select(
-                team_totals_subq.c.debate_id.label("debate_id"),
-                func.jsonb_object_agg(
-                    team_totals_subq.c.position,
-                    team_totals_subq.c.total,
-                ).label("totals_json"),
-            )
-            .group_by(team_totals_subq.c.debate_id)
-        ).subquery()
-
-        # 2) Debates prontos por rodada, com todas as agregações (1 query)
-        debates_rows = sess.execute(
-            select(
-                Debate.round_id,
-                Debate.id.label("debate_id"),
-                Debate.number_in_round.label("debate_number"),
-                positions_subq.c.positions_json,
-                speeches_subq.c.speeches_json,
-                judges_subq.c.chair,
-                judges_subq.c.wings,
-                totals_subq.c.totals_json,
-            )
-            .select_from(Debate)
-            .join(positions_subq, positions_subq.c.debate_id == Debate.id, isouter=True)
-            .join(speeches_subq, speeches_subq.c.debate_id == Debate.id, isouter=True)
-            .join(judges_subq, judges_subq.c.debate_id == Debate.id, isouter=True)
-            .join(totals_subq, totals_subq.c.debate_id == Debate.id, isouter=True)
-            .where(Debate.round_id.in_(round_ids))
-            .order_by(Debate.round_id.asc(), Debate.number_in_round.asc())
-        ).all()
-
-        # 3) Montagem final em memória (linear, sem next()/buscas aninhadas)
-        by_round = {
-            r_id: {
-                "id": r_id,
-                "number": r_num,
-                "date": r_date,
-                "scores_published": bool(scores_pub),
-                "debates": [],
-            }
-            for (r_id, r_num, _rname, r_date, scores_pub, _dc, _st) in r_rows
-        }
-
-        for (rid, deb_id, dnum, positions_json, speeches_json, chair, wings, totals_json) in debates_rows:
-            # reconstruir estruturas simples p/ a view
-            positions = sorted(
-                [
-                    {"position": obj["position"], "short_name": obj["short_name"]}
-                    for obj in (positions_json or [])
-                ],
-                key=lambda x: {"OG": 1, "OO": 2, "CG": 3, "CO": 4}.get(x["position"], 99),
-            )
-
-            # speeches: agrupar por posição mantendo ordem seq
-            speeches_by_pos = {"OG": [], "OO": [], "CG": [], "CO": []}
-            for obj in (speeches_json or []):
-                speeches_by_pos.setdefault(obj["position"], []).append(
-                    {"name": obj["name"], "score": obj["score"], "seq": int(obj["seq"])}
-                )
-            for posk in list(speeches_by_pos.keys()):
-                speeches_by_pos[posk].sort(key=lambda it: it["seq"])
-
-            # calcular totals/ranks (independente de published — a view decide exibir)
-            totals_map = {}
-            if totals_json:
-                # totals_json vem {position: total} apenas quando há 2 falas com nota
-                totals_map = {k: int(v) if v is not None else None for k, v in totals_json.items()}
-            else:
-                # manter None quando não há 2 falas válidas
-                totals_map = {
-                    posk: (sum((s["score"] or 0) for s in speeches_by_pos[posk]) if len(speeches_by_pos[posk]) == 2 else None)
-                    for posk in ["OG", "OO", "CG", "CO"]
-                }
-
-            order_for_rank = sorted(
-                [(posk, totals_map.get(posk)) for posk in ["OG", "OO", "CG", "CO"]],
-                key=lambda t: (-t[1] if t[1] is not None else 10**9),
-            )
-            rank_by_pos = {posk: (idx + 1) for idx, (posk, _tot) in enumerate(order_for_rank)}
-
-            by_round[rid]["debates"].append({
-                "id": deb_id,
-                "number": dnum,
-                "positions": positions,
-                "speeches": speeches_by_pos,
-                "judges": {"chair": chair, "wings": wings or []},
-                "rank_by_pos": rank_by_pos,
-                "total_by_pos": totals_map,
-            })
-
-        # ordenar debates dentro de cada round
-        is_staff = session.get('auth_kind') == 'staff'
-        result_rounds = []
-        for rid, rdata in sorted(by_round.items(), key=lambda kv: kv[1]["number"]):
-            rdata["debates"].sort(key=lambda d: d["number"])
-            result_rounds.append({
-                "id": rid,
-                "number": rdata["number"],
-                "date": rdata["date"],
-                "scores_published": rdata["scores_published"] or is_staff,
-                "debates": rdata["debates"],
-            })
-
-        return render_template("results_list.html", rounds=result_rounds)
-
-    finally:
-        sess.close()
-
-class LoginUser(UserMixin):
-    """ Wrapper para integrar User do banco com Flask-Login """
-    def __init__(self, db_user: User):
-        self.id = str(db_user.id)
-        self.email = db_user.email
-        self.role = db_user.role
-        self.is_active_flag = db_user.is_active
-
-    @property
-    def is_active(self):  # Flask-Login integration
-        return True if self.is_active_flag else False
-
-@login_manager.user_loader
-def load_user(user_id):
-    sess = SessionLocal()
-    try:
-        u = sess.get(User, int(user_id))
-        return LoginUser(u) if u else None
-    finally:
-        sess.close()
-
-def roles_required(*roles):
-    def decorator(fn):
-        @wraps(fn)
-        def wrapped(*args, **kwargs):
-            # precisa estar logado como staff
-            if session.get('auth_kind') != 'staff':
-                flash("Faça login como staff.", "error")
-                return redirect(url_for('login', next=request.path))
-            # precisa ter um dos papéis exigidos
-            user_role = session.get('role')
-            if roles and user_role not in roles:
-                return render_template("403.html"), 403
-            return fn(*args, **kwargs)
-        return wrapped
-    return decorator
-
-def get_current_edition(sess):
-    return sess.execute(
-        select(Edition).order_by(Edition.year.desc()).limit(1)
-    ).scalar_one_or_none()
-
-# ---------- Rotas de login/logout unificadas ----------
-@app.get("/login")
-def login():
-    return render_template("login_unified.html")
-
-
-@app.post("/login")
-def do_login():
-    mode = (request.form.get("mode") or "staff").lower()  # 'staff' ou 'society'
-    email = (request.form.get("email") or "").strip().lower()
-    password = request.form.get("password") or ""
-    nxt = request.args.get("next") or url_for("home")
-
-    if not email or not password:
-        flash("Informe e-mail e senha.", "error")
-        return redirect(url_for("login", next=nxt))
-
-    dbs = SessionLocal()
-    try:
-        if mode == "staff":
-            u = dbs.execute(
-                select(User).where(User.email == email, User.is_active == True)
-            ).scalar_one_or_none()
-            if not u or not check_password_hash(u.password_hash, password):
-                flash("E-mail ou senha inválidos.", "error")
-                return redirect(url_for("login", next=nxt))
-            session.clear()
-            session["auth_kind"] = "staff"
-            session["user_id"] = u.id
-            session["role"] = u.role
-            return redirect(nxt)
-
-        # mode == "society"
-        acc = dbs.execute(
-            select(SocietyAccount).where(SocietyAccount.email == email, SocietyAccount.is_active == True)
-        ).scalar_one_or_none()
-        if not acc or not check_password_hash(acc.password_hash, password):
-            flash("E-mail ou senha inválidos.", "error")
-            return redirect(url_for("login", next=nxt))
-        session.clear()
-        session["auth_kind"] = "society"
-        session["soc_acc_id"] = acc.id
-        session["edition_society_id"] = acc.edition_society_id
-        return redirect(nxt)
-    finally:
-        dbs.close()
-
-@app.post("/logout")
-def logout():
-    session.clear()
-    return redirect(url_for("login"))
-
-
-@app.get("/")
-def home():
-    # página inicial (templates/index.html)
-    return render_template("index.html")
-
-
-# --- Página Inserir Resultados (somente diretor/admin) ---
-@app.get("/results")
-@roles_required("director", "admin")
-def results_form():
-    sess = SessionLocal()
-    try:
-        edition = get_current_edition(sess)
-        if not edition:
-            flash("Nenhuma edição encontrada.", "error")
-            return redirect(url_for("home"))
-
-        # todas as rodadas da edição
-        rounds = sess.execute(
-            select(Round.id, Round.number, Round.name)
-            .where(Round.edition_id == edition.id)
-            .order_by(Round.number.asc())
-        ).all()
-        round_ids = [r_id for (r_id, _n, _nm) in rounds]
-
-        # >>> CONTAR APENAS SPEECHES COM SCORE != NULL POR DEBATE
-        sp_scored = func.count(Speech.id).filter(Speech.score.is_not(None)).label("sp_scored")
-        deb_speech_counts = sess.execute(
-            select(Debate.round_id, Debate.id, sp_scored)
-            .join(Speech, Speech.debate_id == Debate.id, isouter=True)
-            .where(Debate.round_id.in_(round_ids))
-            .group_by(Debate.round_id, Debate.id)
-        ).all()
-
-        # round_id -> [True/False por debate]
-        from collections import defaultdict
-        round_done = defaultdict(list)
-        for r_id, d_id, scored in deb_speech_counts:
-            round_done[r_id].append(int(scored or 0) == 8)  # <<< exatamente 8 notas não nulas
-
-        # rounds com flag "completed"
-        rounds_with_status = []
-        for (r_id, r_num, r_name) in rounds:
-            flags = round_done.get(r_id, [])
-            # completed = existe pelo menos 1 debate E todos têm 8 notas não nulas
-            completed = bool(flags) and all(flags)
-            rounds_with_status.append((r_id, r_num, r_name, completed))
-
-        # debates da 1ª rodada para popular inicial (completude também)
-        first_round_id = rounds_with_status[0][0] if rounds_with_status else None
-        debates = [] # TODO!
-        if first_round_id:
-            debates = sess.execute(
-                select(
-                    Debate.id,
-                    Debate.number_in_round,
-                    sp_scored,  # << mesmo critério
-                )
-                .join(Speech, Speech.debate_id == Debate.id, isouter=True)
-                .where(Debate.round_id == first_round_id)
-                .group_by(Debate.id)
-                .order_by(Debate.number_in_round.asc())
-            ).all()
-            debates = [
-                {
-                    "id": d_id,
-                    "number_in_round": n,
-                    "completed": int(scored or 0) == 8   # << exatamente 8 notas não nulas
-                }
-                for (d_id, n, scored) in debates
-            ]
-
-        # use 'debates' se quiser já preencher a lista inicial:
-        return render_template("results.html", rounds=rounds_with_status, debates=[])
-        # se preferir vazio inicialmente, troque por: debates=[]
-
-    finally:
-        sess.close()
-# --- APIs auxiliares para o form ---
-
-@app.get("/api/round_debates")
-@roles_required("director", "admin")
-def api_round_debates():
-    round_id = int(request.args.get("round_id"))
-    sess = SessionLocal()
-    try:
-        sp_scored = func.count(Speech.id).filter(Speech.score.is_not(None)).label("sp_scored")
-
-        rows = sess.execute(
-            select(
-                Debate.id,
-                Debate.number_in_round,
-                sp_scored,
-            )
-            .select_from(Debate)
-            .outerjoin(Speech, Speech.debate_id == Debate.id)
-            .where(Debate.round_id == round_id)
-            .group_by(Debate.id)
-            .order_by(Debate.number_in_round.asc())
-        ).all()
-
-        data = [
-            {
-                "id": d_id,
-                "number_in_round": n,
-                "completed": int(scored or 0) == 8,
-            }
-            for (d_id, n, scored) in rows
-        ]
-        return jsonify(data=data)
-    finally:
-        sess.close()
-
-@app.get("/api/debate_detail")
-@roles_required("director", "admin")  # mantenha protegido
-def api_debate_detail():
-    debate_id = request.args.get("debate_id", type=int)
-    if not debate_id:
-        return jsonify({"error": "debate_id inválido"}), 400
-
-    sess = SessionLocal()
-    try:
-        # ---------------------------------------------
-        # Query 1: meta + posições + lineup (1 ida só)
-        # ---------------------------------------------
-        # lineup por posição neste debate
-        lineup_subq = (
-            select(
-                Speech.position.label("position"),
-                func.array_agg(
-                    aggregate_order_by(Speech.edition_member_id, Speech.sequence_in_team.asc())
-                ).label("lineup"),
-            )
-            .select_from(Speech)
-            .where(Speech.debate_id == debate_id)
-            .group_by(Speech.position)
-            .subquery()
-        )
-
-        pos_rows = sess.execute(
-            select(
-                Round.edition_id,                             # para queries seguintes
-                DebatePosition.position,
-                DebatePosition.edition_society_id,
-                EditionSociety.society_id,                    # para filtrar juízes de fora
-                Society.short_name,
-                lineup_subq.c.lineup,                         # [edition_member_id, ...] ordenado
-            )
-            .select_from(DebatePosition)
-            .join(Debate, Debate.id == DebatePosition.debate_id)
-            .join(Round, Round.id == Debate.round_id)
-            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
-            .join(Society, Society.id == EditionSociety.society_id)
-            .join(lineup_subq, lineup_subq.c.position == DebatePosition.position, isouter=True)
-            .where(DebatePosition.debate_id == debate_id)
-            .order_by(ORDER_POS.asc())
-        ).all()
-        print(pos_rows)
-        if not pos_rows:
-            return jsonify({"error": "Debate não encontrado"}), 404
-
-        # extrai edition_id / societies do debate e monta payload "positions"
-        edition_id = pos_rows[0][0]
-        positions = []
-        edsoc_ids = []
-        team_soc_ids = set()
-
-        for (_edition_id, position, edsoc_id, base_soc_id, short_name, lineup) in pos_rows:
-            positions.append({
-                "position": position,
-                "team_short": short_name,
-                "edition_society_id": edsoc_id,
-                "lineup": list(lineup or []),  # já ordenado por sequence_in_team
-            })
-            edsoc_ids.append(edsoc_id)
-            team_soc_ids.add(base_soc_id)
-
-        # ---------------------------------------------
-        # Query 2: debatedores elegíveis (4 sociedades)
-        # ---------------------------------------------
-        EM = aliased(EditionMember)
-        deb_rows = sess.execute(
-            select(
-                EM.id,
-                Person.full_name,
-                Society.short_name,
-            )
-            .select_from(EM)
-            .join(Person, Person.id == EM.person_id)
-            .join(Society, Society.id == Person.society_id)
-            .where(
-                EM.edition_id == edition_id,
-                EM.kind == cast(literal("debater"), MemberKindEnum),  # <-- cast para o enum
-                Person.society_id.in_(team_soc_ids),
-            )
-            .order_by(Society.short_name.asc(), Person.full_name.asc())
-        ).all()
-
-        debaters = [
-            {"edition_member_id": mid, "name": name, "soc": short}
-            for (mid, name, short) in deb_rows
-        ]
-
-        # ---------------------------------------------
-        # Query 3: juízes elegíveis (fora das 4 sociedades)
-        # ---------------------------------------------
-        J = aliased(EditionMember)
-        judge_rows = sess.execute(
-            select(
-                J.id,
-                Person.full_name,
-                Society.short_name,
-            )
-            .select_from(J)
-            .join(Person, Person.id == J.person_id)
-            .join(Society, Society.id == Person.society_id)   # mantém a mesma semântica do seu código
-            .where(
-                J.edition_id == edition_id,
-                J.kind == cast(literal("judge"), MemberKindEnum),     # <-- cast para o enum
-                ~Person.society_id.in_(team_soc_ids),          # exclui as 4 sociedades
-            )
-            .order_by(Society.short_name.asc(), Person.full_name.asc())
-        ).all()
-
-        judges = [
-            {"edition_member_id": mid, "name": name, "soc": short}
-            for (mid, name, short) in judge_rows
-        ]
-
-        return jsonify({"data": {
-            "positions": positions,
-            "debaters": debaters,
-            "judges": judges
-        }})
-
-    finally:
-        sess.close()
-
-
-@app.post("/api/results")
-@roles_required("director", "admin")
-def api_save_results():
-    payload = request.get_json(force=True, silent=False)
-    debate_id = int(payload.get("debate_id"))
-    speeches = payload.get("speeches") or []
-    judges = payload.get("judges") or {}
-
-    sess = SessionLocal()
-    try:
-        # validar debate -> edição
-        round_row = sess.execute(
-            select(Round.id, Round.edition_id)
-            .join(Debate, Debate.round_id == Round.id)
-            .where(Debate.id == debate_id)
-        ).one_or_none()
-        if not round_row:
-            return jsonify(error="Debate inexistente"), 400
-        _, edition_id = round_row
-
-        # helper correto: monta o statement e só então executa
-        def valid_em(em_id, kind=None):
-            if not em_id:
-                return False
-            stmt = (
-                select(EditionMember.id)
-                .where(
-                    EditionMember.id == int(em_id),
-                    EditionMember.edition_id == edition_id,
-                )
-            )
-            if kind:
-                stmt = stmt.where(EditionMember.kind == kind)
-            return sess.execute(stmt).scalar_one_or_none() is not None
-
-        # valida & upsert speeches
-        valid_positions = {"OG", "OO", "CG", "CO"}
-        for item in speeches:
-            pos = (item.get("position") or "").upper()
-            s1_id = item.get("s1_id")
-            s1_score = item.get("s1_score")
-            s2_id = item.get("s2_id")
-            s2_score = item.get("s2_score")
-
-            if pos not in valid_positions:
-                return jsonify(error=f"Posição inválida: {pos}"), 400
-
-            if not (valid_em(s1_id, "debater") and valid_em(s2_id, "debater")):
-                return jsonify(error=f"Debaters inválidos para {pos}"), 400
-
-            # scores inteiros 50–100
-            def vs(x):
-                try:
-                    xi = int(x)
-                    return 50 <= xi <= 100
-                except Exception:
-                    return False
-
-            if not (vs(s1_score) and vs(s2_score)):
-                return jsonify(error=f"Scores inválidos (50–100) em {pos}"), 400
-
-            # upsert Speech (seq 1 e 2)
-            sp1 = sess.execute(
-                select(Speech).where(
-                    Speech.debate_id == debate_id,
-                    Speech.position == pos,
-                    Speech.sequence_in_team == 1,
-                )
-            ).scalar_one_or_none()
-            if not sp1:
-                sess.add(
-                    Speech(
-                        debate_id=debate_id,
-                        position=pos,
-                        sequence_in_team=1,
-                        edition_member_id=int(s1_id),
-                        score=int(s1_score),
-                    )
-                )
-            else:
-                sp1.edition_member_id = int(s1_id)
-                sp1.score = int(s1_score)
-
-            sp2 = sess.execute(
-                select(Speech).where(
-                    Speech.debate_id == debate_id,
-                    Speech.position == pos,
-                    Speech.sequence_in_team == 2,
-                )
-            ).scalar_one_or_none()
-            if not sp2:
-                sess.add(
-                    Speech(
-                        debate_id=debate_id,
-                        position=pos,
-                        sequence_in_team=2,
-                        edition_member_id=int(s2_id),
-                        score=int(s2_score),
-                    )
-                )
-            else:
-                sp2.edition_member_id = int(s2_id)
-                sp2.score = int(s2_score)
-
-        # juízes: chair + até 2 wings (todos distintos entre si)
-        chair_id = judges.get("chair")
-        wings = [w for w in (judges.get("wings") or []) if w]
-
-        if chair_id and not valid_em(chair_id, "judge"):
-            return jsonify(error="Chair inválido"), 400
-        for w in wings:
-            if not valid_em(w, "judge"):
-                return jsonify(error="Wing inválido"), 400
-        # não permitir duplicados (chair igual a wing, ou wings repetidos)
-        all_judges = [int(chair_id)] + [int(w) for w in wings] if chair_id else [int(w) for w in wings]
-        if len(all_judges) != len(set(all_judges)):
-            return jsonify(error="Juízes duplicados não são permitidos"), 400
-        if len(wings) > 2:
-            return jsonify(error="No máximo 2 wings"), 400
-
-        from models import DebateJudge  # evitar import circular no topo
-
-        # zera chair atual e insere o novo (se houver)
-        sess.execute(
-            DebateJudge.__table__.delete().where(
-                DebateJudge.debate_id == debate_id, DebateJudge.role == "chair"
-            )
-        )
-        if chair_id:
-            sess.add(
-                DebateJudge(
-                    debate_id=debate_id, edition_member_id=int(chair_id), role="chair"
-                )
-            )
-
-        # zera wings e recria
-        sess.execute(
-            DebateJudge.__table__.delete().where(
-                DebateJudge.debate_id == debate_id, DebateJudge.role == "wing"
-            )
-        )
-        for w in wings:
-            sess.add(
-                DebateJudge(debate_id=debate_id, edition_member_id=int(w), role="wing")
-            )
-
-        sess.commit()
-        return jsonify(ok=True)
-    except Exception as e:
-        sess.rollback()
-        return jsonify(error=str(e)), 500
-    finally:
-        sess.close()
-
-
-
-@app.get("/api/standings")
-def api_standings(debug=False):
-    sess = SessionLocal()
-    try:
-        is_staff = session.get('auth_kind') == 'staff'
-        edition_param = request.args.get("edition", "current")
-
-        if edition_param == "current":
-            edition = get_current_edition(sess)
-        else:
-            edition = sess.execute(
-                select(Edition).where(Edition.year == int(edition_param))
-            ).scalar_one_or_none()
-
-        if not edition:
-            return jsonify(data=[])
-
-        # ------------------------------------------------------------
-        # 1) Totais por (debate, posição/equipe) com contagem de falas
-        #    (Speech -> Debate -> Round) + DebatePosition para mapear ES
-        # ------------------------------------------------------------
-        team_scores_per_team_sq = (
-            select(
-                Speech.debate_id.label("debate_id"),
-                Speech.position.label("position"),
-                DebatePosition.edition_society_id.label("es_id"),
-                func.sum(Speech.score).label("team_total"),
-                func.count(Speech.id).label("speech_count"),
-                Round.scores_published.label("scores_published"),
-            )
-            .join(Debate, Debate.id == Speech.debate_id)
-            .join(Round, Round.id == Debate.round_id)
-            .join(
-                DebatePosition,
-                and_(
-                    DebatePosition.debate_id == Speech.debate_id,
-                    DebatePosition.position == Speech.position,
-                ),
-            )
-            .where(
-                Round.edition_id == edition.id,
-                Round.silent.is_(False),
-                Speech.score.is_not(None),
-            )
-            .group_by(
-                Speech.debate_id,
-                Speech.position,
-                DebatePosition.edition_society_id,
-                Round.scores_published,
-            )
-            .subquery()
-        )
-
-        # ------------------------------------------------------------
-        # 2) Debates completos = 4 linhas com speech_count=2 (OG/OO/CG/CO)
-        # ------------------------------------------------------------
-        complete_debates_sq = (
-            select(team_scores_per_team_sq.c.debate_id)
-            .where(team_scores_per_team_sq.c.speech_count == 2)
-            .group_by(team_scores_per_team_sq.c.debate_id)
-            .having(func.count() == 4)
-            .subquery()
-        )
-
-        # ------------------------------------------------------------
-        # 3) Subconsulta com rank() por debate (apenas debates completos)
-        #    IMPORTANTE: a janela fica AQUI (subquery), não no nível agregado
-        # ------------------------------------------------------------
-        ranked_sq = (
-            select(
-                team_scores_per_team_sq.c.debate_id,
-                team_scores_per_team_sq.c.es_id,
-                team_scores_per_team_sq.c.team_total,
-                team_scores_per_team_sq.c.scores_published,
-                func.rank().over(
-                    partition_by=team_scores_per_team_sq.c.debate_id,
-                    order_by=team_scores_per_team_sq.c.team_total.desc(),
-                ).label("rnk"),
-            )
-            .join(
-                complete_debates_sq,
-                complete_debates_sq.c.debate_id == team_scores_per_team_sq.c.debate_id,
-            )
-            .where(team_scores_per_team_sq.c.speech_count == 2)
-            .subquery()
-        )
-
-        # mapeamento 3-2-1-0 + contagens
-        points_expr = case(
-            (ranked_sq.c.rnk == 1, literal(3)),
-            (ranked_sq.c.rnk == 2, literal(2)),
-            (ranked_sq.c.rnk == 3, literal(1)),
-            else_=literal(0),
-        )
-        firsts_expr = case((ranked_sq.c.rnk == 1, literal(1)), else_=literal(0))
-        seconds_expr = case((ranked_sq.c.rnk == 2, literal(1)), else_=literal(0))
-        sp_expr = case(
-            (
-                or_(
-                    ranked_sq.c.scores_published.is_(True),
-                    literal(is_staff)
-                ),
-                ranked_sq.c.team_total
-            ),
-            else_=literal(0),
-        )
-
-        # ------------------------------------------------------------
-        # 4) Agregado final por equipe (EditionSociety)
-        #    (agora SIM podemos somar, pois o rank ficou na subquery)
-        # ------------------------------------------------------------
-        standings_sq = (
-            select(
-                ranked_sq.c.es_id.label("es_id"),
-                func.sum(points_expr).label("points"),
-                func.sum(sp_expr).label("speaker_points"),
-                func.sum(firsts_expr).label("firsts"),
-                func.sum(seconds_expr).label("seconds"),
-                func.count().label("debates"),
-            )
-            .group_by(ranked_sq.c.es_id)
-            .subquery()
-        )
-
-        # ------------------------------------------------------------
-        # 5) Base (todas as sociedades inscritas != "Independente")
-        #    + LEFT JOIN com o agregado e ordenação final no banco
-        # ------------------------------------------------------------
-        base_q = (
-            select(
-                EditionSociety.id.label("es_id"),
-                Society.id.label("society_id"),
-                Society.short_name.label("short_name"),
-            )
-            .join(Society, Society.id == EditionSociety.society_id)
-            .where(
-                EditionSociety.edition_id == edition.id,
-                func.trim(func.coalesce(Society.short_name, "")) != "Independente",
-            )
-            .subquery()
-        )
-
-        final_q = (
-            select(
-                base_q.c.es_id.label("edsoc_id"),  # <— novo
-                base_q.c.society_id,
-                base_q.c.short_name,
-                func.coalesce(standings_sq.c.points, literal(0)).label("points"),
-                func.coalesce(standings_sq.c.speaker_points, literal(0)).label("speaker_points"),
-                func.coalesce(standings_sq.c.firsts, literal(0)).label("firsts"),
-                func.coalesce(standings_sq.c.seconds, literal(0)).label("seconds"),
-                func.coalesce(standings_sq.c.debates, literal(0)).label("debates"),
-            )
-            .join(standings_sq, standings_sq.c.es_id == base_q.c.es_id, isouter=True)
-            .order_by(
-                func.coalesce(standings_sq.c.points, literal(0)).desc(),
-                func.coalesce(standings_sq.c.speaker_points, literal(0)).desc(),
-                func.coalesce(standings_sq.c.firsts, literal(0)).desc(),
-                func.coalesce(standings_sq.c.seconds, literal(0)).desc(),
-                base_q.c.short_name.asc(),
-            )
-        )
-
-        rows = sess.execute(final_q).all()
-
-        data = [
-            dict(
-                edsoc_id=es_id,  # <— novo campo no payload
-                society_id=sid,
-                short_name=(sn or "").strip(),
-                points=int(p),
-                speaker_points=int(sp),
-                firsts=int(f),
-                seconds=int(s2),
-                debates=int(db),
-            )
-            for es_id, sid, sn, p, sp, f, s2, db in rows
-        ]
-        return jsonify(data=data) if not debug else data
-    finally:
-        sess.close()
-
-@app.get("/api/next_pairings")
-def api_next_pairings():
-    """
-    Pareamentos (OG/OO/CG/CO) da próxima rodada sem resultados.
-    Retorna apenas short_name nas posições.
-    """
-    sess = SessionLocal()
-    try:
-        # --- edição alvo ---
-        edition_param = request.args.get("edition", "current")
-        if edition_param == "current":
-            edition = get_current_edition(sess)
-        else:
-            edition = sess.execute(
-                select(Edition).where(Edition.year == int(edition_param))
-            ).scalar_one_or_none()
-
-        if not edition:
-            return jsonify(data=[])
-
-        # ------------------------------------------------------------
-        # 1) Encontrar a primeira rodada SEM resultados
-        #    Critério: NÃO existe Speech com score != NULL em debates da rodada
-        # ------------------------------------------------------------
-        any_scored_subq = (
-            select(literal(1))   # <---- aqui é literal(1), não func.literal
-            .select_from(Debate)
-            .join(Speech, Speech.debate_id == Debate.id)
-            .where(
-                Debate.round_id == Round.id,   # correlacionada com Round externo
-                Speech.score.is_not(None),
-            )
-            .limit(1)
-        )
-
-        next_round_row = sess.execute(
-            select(Round.id, Round.number)
-            .where(
-                Round.edition_id == edition.id,
-                ~exists(any_scored_subq)       # NOT EXISTS
-            )
-            .order_by(Round.number.asc())
-            .limit(1)
-        ).first()
-
-        if not next_round_row:
-            return jsonify(data=[])
-
-        next_round_id, next_round_number = next_round_row
-
-        # ------------------------------------------------------------
-        # 2) Buscar TODOS os pareamentos da rodada encontrada
-        # ------------------------------------------------------------
-        rows = sess.execute(
-            select(
-                Debate.id.label("debate_id"),
-                Debate.number_in_round.label("debate_number"),
-                DebatePosition.position,
-                Society.short_name,
-            )
-            .join(DebatePosition, DebatePosition.debate_id == Debate.id)
-            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
-            .join(Society, Society.id == EditionSociety.society_id)
-            .where(Debate.round_id == next_round_id)
-            .order_by(Debate.number_in_round.asc())
-        ).all()
-
-        from collections import defaultdict
-        by_debate = defaultdict(lambda: {"OG": "", "OO": "", "CG": "", "CO": ""})
-        debate_numbers = {}
-        for d_id, d_num, pos, short in rows:
-            debate_numbers[d_id] = d_num
-            by_debate[d_id][pos] = (short or f"D{d_id}")
-
-        debates_sorted = sorted(debate_numbers.items(), key=lambda kv: kv[1])
-        data = [
-            {
-                "round_number": next_round_number,
-                "debate_number": d_num,
-                "positions": by_debate[d_id],
-            }
-            for d_id, d_num in debates_sorted
-        ]
-
-        return jsonify(data=data)
-    finally:
-        sess.close()
-
-@app.get("/admin")
-@roles_required("director", "admin")
-def admin_panel():
-    sess = SessionLocal()
-    try:
-        edition = get_current_edition(sess)
-        if not edition:
-            return render_template("admin_panel.html", rounds=[])
-        rows = sess.execute(
-            select(Round.id, Round.number, Round.name, Round.scheduled_date,
-                   Round.scores_published, Round.silent)
-            .where(Round.edition_id == edition.id)
-            .order_by(Round.number.asc())
-        ).all()
-        rounds = [
-            {
-                "id": r_id,
-                "number": r_num,
-                "name": r_name,
-                "date": r_date,
-                "scores_published": bool(scores),
-                "silent": bool(sil)
-            }
-            for (r_id, r_num, r_name, r_date, scores, sil) in rows
-        ]
-        return render_template("admin_panel.html", rounds=rounds)
-    finally:
-        sess.close()
-
-
-@app.post("/api/rounds/<int:round_id>/settings")
-@roles_required("director", "admin")
-def api_update_round_settings(round_id: int):
-    """
-    Body JSON (qualquer um dos dois campos; ambos opcionais):
-    { "scores_published": true|false, "silent": true|false }
-    """
-    payload = request.get_json(silent=True) or {}
-    sess = SessionLocal()
-    try:
-        rnd = sess.get(Round, round_id)
-        if not rnd:
-            return jsonify({"error": "Rodada não encontrada"}), 404
-
-        changed = False
-        if "scores_published" in payload:
-            val = bool(payload["scores_published"])
-            if rnd.scores_published != val:
-                rnd.scores_published = val
-                changed = True
-
-        if "silent" in payload:
-            val = bool(payload["silent"])
-            if rnd.silent != val:
-                rnd.silent = val
-                changed = True
-
-        if changed:
-            sess.commit()
-
-        return jsonify({
-            "ok": True,
-            "data": {
-                "id": rnd.id,
-                "scores_published": rnd.scores_published,
-                "silent": rnd.silent
-            }
-        })
-    finally:
-        sess.close()
-
-
-if __name__ == "__main__":
-    app.run(debug=True)
-
+import os
+import time
+from itertools import groupby
+from pathlib import Path
+from functools import wraps
+
+import orjson
+from flask import Flask, Response, g, jsonify, render_template, request, redirect, url_for, flash, session, abort
+from flask_login import LoginManager, UserMixin
+from werkzeug.security import check_password_hash, generate_password_hash
+from sqlalchemy import bindparam, cast, literal, distinct, desc, exists, insert, select, update, func, case, and_, or_, lambda_stmt, Integer, String
+from sqlalchemy.orm import aliased
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert as pg_insert
+from db import SessionLocal
+from models import (
+    Edition, EditionSociety, Society,
+    Round, Debate, DebatePosition, Speech,
+    EditionMember, Person, User, DebateJudge,
+    SocietyAccount, MemberKindEnum, JudgeRoleEnum
+)
+from consts import MAX_DEBATES_PER_SPEAKER
+
+BASE_DIR = Path(__file__).resolve().parent
+
+app = Flask(
+    __name__,
+    template_folder=str(BASE_DIR / "templates"),
+    static_folder=str(BASE_DIR / "static"),
+    static_url_path="/static",
+)
+app.config.update(
+    SESSION_COOKIE_HTTPONLY=True,
+    SESSION_COOKIE_SAMESITE="Lax",
+    # prod:
+    SESSION_COOKIE_SECURE=True,
+    TEMPLATES_AUTO_RELOAD=False,
+)
+app.secret_key = os.environ.get("SECRET_KEY", "dev-unsafe")
+# cache ilimitado de templates compilados (são poucos; evita recompilar Jinja)
+app.jinja_env.cache_size = -1
+
+# -------- Flask-Login --------
+login_manager = LoginManager(app)
+login_manager.login_view = "login"
+
+# ordem canônica das posições (evita reconstruir a sequência nos loops)
+POSITIONS = ("OG", "OO", "CG", "CO")
+
+
+def fast_json(payload):
+    """jsonify com orjson (encoder em C) p/ os payloads grandes de polling."""
+    return Response(orjson.dumps(payload), mimetype="application/json")
+
+
+# corpo pré-serializado p/ as saídas vazias (comuns antes da edição abrir)
+_EMPTY_DATA_BODY = orjson.dumps({"data": []})
+
+def empty_data_response():
+    return Response(_EMPTY_DATA_BODY, mimetype="application/json")
+
+
+def society_required(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if session.get("auth_kind") != "society" or not session.get("soc_acc_id"):
+            return redirect(url_for("login", next=request.path))
+        return f(*args, **kwargs)
+    return wrapper
+
+def _next_round_without_results(edition_id: int):
+    """CTE (1 linha) com a próxima rodada sem resultados da edição."""
+    # anti-join decorrelacionado: derivamos o conjunto de rodadas que JÁ têm
+    # alguma nota lançada e descartamos via LEFT JOIN ... IS NULL, deixando o
+    # planner livre p/ um hash anti-join em vez de NOT EXISTS por rodada
+    scored_rounds = (
+        select(Debate.round_id.label("round_id"))
+        .join(Speech, Speech.debate_id == Debate.id)
+        .where(Speech.score.is_not(None))
+        .distinct()
+        .subquery("scored_rounds")
+    )
+
+    return (
+        select(
+            Round.id,
+            Round.number,
+            Round.name,
+            Round.scheduled_date.label("date"),
+        )
+        .outerjoin(scored_rounds, scored_rounds.c.round_id == Round.id)
+        .where(
+            Round.edition_id == edition_id,
+            scored_rounds.c.round_id.is_(None),   # NÃO existe score lançado
+        )
+        .order_by(Round.number.asc(), Round.id.asc())
+        .limit(1)
+    ).cte("next_round")
+
+def _get_soc_context(sess):
+    """Retorna (edsoc_id, edition_id, base_society_id) da conta logada de sociedade."""
+    soc_acc_id = session.get("soc_acc_id")
+    edsoc_id = session.get("edition_society_id")
+    if not soc_acc_id or not edsoc_id:
+        return None, None, None
+    ctx = getattr(g, "soc_ctx", None)
+    if ctx is not None and ctx[0] == edsoc_id:
+        return ctx
+    edition_id = session.get("soc_edition_id")
+    society_id = session.get("soc_society_id")
+    if edition_id is None or society_id is None:
+        # cookie de sessão antigo (sem os ids gravados no login): busca uma
+        # vez e regrava, para as próximas requisições não irem ao banco
+        ids = sess.execute(
+            select(EditionSociety.edition_id, EditionSociety.society_id)
+            .where(EditionSociety.id == edsoc_id)
+        ).first()
+        if not ids:
+            return None, None, None
+        edition_id, society_id = ids
+        session["soc_edition_id"] = edition_id
+        session["soc_society_id"] = society_id
+    ctx = (edsoc_id, edition_id, society_id)
+    g.soc_ctx = ctx
+    return ctx
+
+
+def _debates_of_round_for_soc(next_round, edition_society_id: int):
+    """Subquery escalar: JSON com os debates/posições da sociedade na rodada do CTE."""
+    slots = (
+        select(
+            Debate.id.label("debate_id"),
+            Debate.number_in_round.label("number_in_round"),
+            DebatePosition.position.label("position"),
+            DebatePosition.position_order.label("position_order"),
+            # locked = existe algum score não-nulo nesse slot (posição do nosso time)
+            func.bool_or(Speech.score.is_not(None)).label("locked"),
+            # agregação condicional: só os 2 slots escalares, sem montar um
+            # array JSON que o caller descartaria além do 1º/2º elemento
+            func.max(EditionMember.id).filter(Speech.sequence_in_team == 1).label("s1_id"),
+            func.max(Person.full_name).filter(Speech.sequence_in_team == 1).label("s1_name"),
+            func.max(EditionMember.id).filter(Speech.sequence_in_team == 2).label("s2_id"),
+            func.max(Person.full_name).filter(Speech.sequence_in_team == 2).label("s2_name"),
+        )
+        .select_from(DebatePosition)
+        .join(Debate, Debate.id == DebatePosition.debate_id)
+        .join(next_round, Debate.round_id == next_round.c.id)
+        .outerjoin(
+            Speech,
+            (Speech.debate_id == Debate.id) &
+            (Speech.position == DebatePosition.position)
+        )
+        .outerjoin(EditionMember, EditionMember.id == Speech.edition_member_id)
+        .outerjoin(Person, Person.id == EditionMember.person_id)
+        .where(DebatePosition.edition_society_id == edition_society_id)
+        .group_by(
+            Debate.id, Debate.number_in_round,
+            DebatePosition.position, DebatePosition.position_order,
+        )
+    ).subquery("soc_slots")
+
+    return (
+        select(
+            func.jsonb_agg(
+                aggregate_order_by(
+                    func.jsonb_build_object(
+                        literal("debate_id"), slots.c.debate_id,
+                        literal("number_in_round"), slots.c.number_in_round,
+                        literal("position"), slots.c.position,
+                        literal("locked"), slots.c.locked,
+                        literal("s1_id"), slots.c.s1_id,
+                        literal("s1_name"), slots.c.s1_name,
+                        literal("s2_id"), slots.c.s2_id,
+                        literal("s2_name"), slots.c.s2_name,
+                    ),
+                    slots.c.number_in_round.asc(),
+                    slots.c.position_order.asc(),
+                )
+            )
+        )
+        .select_from(slots)
+        .scalar_subquery()
+    )
+
+
+# debatedores da sociedade com contagem de usos em rodadas ANTERIORES à do CTE
+def _eligible_debaters_for_next_round(next_round, edition_id: int, base_society_id: int):
+    EM = aliased(EditionMember)
+
+    # conta debates distintos (onde houve pelo menos uma speech com score != NULL);
+    # os predicados vivem no ON dos joins — o planner poda por índice antes de
+    # agregar — e o FILTER só checa se a Round "anterior" sobreviveu ao join.
+    # (Round.edition_id seria redundante: o EM já está preso à edição no WHERE)
+    used_count = func.count(
+        distinct(Speech.debate_id)
+    ).filter(Round.id.is_not(None)).label("used_count")
+
+    members = (
+        select(
+            EM.id.label("id"),
+            Person.full_name.label("name"),
+            used_count,
+        )
+        .select_from(EM)
+        .join(Person, Person.id == EM.person_id)
+        .outerjoin(
+            Speech,
+            (Speech.edition_member_id == EM.id) & Speech.score.is_not(None),
+        )
+        .outerjoin(Debate, Debate.id == Speech.debate_id)
+        .outerjoin(
+            Round,
+            (Round.id == Debate.round_id) & (Round.number < next_round.c.number),
+        )
+        .where(
+            EM.edition_id == edition_id,
+            EM.kind == cast(literal("debater"), MemberKindEnum),  # enum OK
+            Person.society_id == base_society_id,
+        )
+        .group_by(EM.id, Person.full_name)
+        # elegibilidade direto no HAVING: quem estourou o limite nem sai do banco
+        .having(used_count < MAX_DEBATES_PER_SPEAKER)
+    ).subquery("soc_debaters")
+
+    return (
+        select(
+            func.jsonb_agg(
+                aggregate_order_by(
+                    func.jsonb_build_object(
+                        literal("id"), members.c.id,
+                        literal("name"), members.c.name,
+                    ),
+                    members.c.name.asc(),
+                )
+            )
+        )
+        .select_from(members)
+        .scalar_subquery()
+    )
+
+
+
+@app.get("/health-check")
+def health_check():
+    return "ok"
+
+# ---------- Página: Escalação (sociedade) ----------
+@app.get("/soc/escalacao")
+@society_required
+def page_escalacao():
+    sess = SessionLocal()
+    try:
+        edsoc_id, edition_id, base_soc_id = _get_soc_context(sess)
+        if not edsoc_id:
+            return redirect(url_for("login"))
+
+        # uma ida só: CTE da próxima rodada + debates e debatedores como
+        # subqueries escalares JSON penduradas nela
+        next_round_cte = _next_round_without_results(edition_id)
+        row = sess.execute(
+            select(
+                next_round_cte.c.id,
+                next_round_cte.c.number,
+                next_round_cte.c.name,
+                next_round_cte.c.date,
+                _debates_of_round_for_soc(next_round_cte, edsoc_id).label("debates_json"),
+                _eligible_debaters_for_next_round(
+                    next_round_cte, edition_id, base_soc_id
+                ).label("debaters_json"),
+            ).select_from(next_round_cte)
+        ).mappings().first()
+
+        if not row:
+            # não há rodada aberta para escalação
+            return render_template("escalacao.html",
+                                   next_round=None, debates=[], debaters=[])
+
+        next_round = {
+            "id": row["id"], "number": row["number"],
+            "name": row["name"], "date": row["date"],
+        }
+
+        debates = []
+        for item in (row["debates_json"] or []):
+            s1 = {"id": item["s1_id"], "name": item["s1_name"]} if item["s1_id"] is not None else None
+            s2 = {"id": item["s2_id"], "name": item["s2_name"]} if item["s2_id"] is not None else None
+            debates.append({
+                "debate_id": item["debate_id"],
+                "number_in_round": item["number_in_round"],
+                "position": item["position"],
+                "s1": s1,
+                "s2": s2,
+                "locked": bool(item["locked"]),
+            })
+
+        # elegibilidade (< MAX_DEBATES_PER_SPEAKER) já filtrada no HAVING
+        debaters = row["debaters_json"] or []
+
+        return render_template("escalacao.html",
+                               next_round=next_round,
+                               debates=debates,
+                               debaters=debaters)
+    finally:
+        sess.close()
+
+
+@app.get("/sociedade/<int:edsoc_id>")
+def view_society_history(edsoc_id: int):
+    return ""
+    sess = SessionLocal()
+    EM2 = aliased(EditionMember)
+    try:
+        # 0) EditionSociety + Society nomes (uma ida só)
+        edsoc_row = sess.execute(
+            select(
+                EditionSociety.id,
+                EditionSociety.edition_id,
+                EditionSociety.society_id,
+                Society.short_name,
+                Society.name
+            ).join(Society, Society.id == EditionSociety.society_id
+            ).where(EditionSociety.id == edsoc_id)
+        ).first()
+
+        if not edsoc_row:
+            abort(404)
+
+        _, edition_id, society_id, short_name, full_name = edsoc_row
+
+        # 1) Debatedores da sociedade na edição + contagem de usos (scores não-nulos)
+        #    LEFT JOIN em Speech/Debate/Round permite "0" usos naturalmente
+        used_count = func.count(distinct(Speech.debate_id)).filter(
+            Speech.score.is_not(None)
+        ).label("used_count")
+
+        deb_rows = sess.execute(
+            select(
+                EM2.id.label("member_id"),
+                Person.full_name,
+                used_count,
+            )
+            .join(Person, Person.id == EM2.person_id)
+            .outerjoin(Speech, Speech.edition_member_id == EM2.id)
+            .outerjoin(Debate, Debate.id == Speech.debate_id)
+            .outerjoin(Round, Round.id == Debate.round_id)
+            .where(
+                EM2.edition_id == edition_id,
+                EM2.kind == cast(literal("debater"), MemberKindEnum),
+                Person.society_id == society_id,
+                # restringe à edição, mas preserva quem nunca falou (Round NULL)
+                (Round.edition_id == edition_id) | (Round.id.is_(None)),
+            )
+            .group_by(EM2.id, Person.full_name)
+            .order_by(desc(used_count))
+        ).all()
+
+        debaters_table = [
+            {"id": mid, "name": name, "times": int(used or 0)}
+            for (mid, name, used) in deb_rows
+        ]
+
+        # 2) HISTÓRICO em uma query com CTEs (debates, rank, mapas e speakers)
+        # our_debates: debates da sociedade na edição corrente
+        our_debates = (
+            select(
+                Round.id.label("round_id"),
+                Round.number.label("round_number"),
+                Round.name.label("round_name"),
+                Round.scheduled_date.label("round_date"),
+                Round.scores_published.label("scores_published"),
+                Round.silent.label("silent"),
+                Debate.id.label("debate_id"),
+                Debate.number_in_round.label("debate_number"),
+                DebatePosition.position.label("our_position"),
+            )
+            .join(Debate, Debate.round_id == Round.id)
+            .join(DebatePosition, DebatePosition.debate_id == Debate.id)
+            .where(
+                Round.edition_id == edition_id,
+                DebatePosition.edition_society_id == edsoc_id,
+            )
+            .cte("our_debates")
+        )
+
+        # team_scores: soma por (debate, equipe) quando houver 2 discursos com nota.
+        # O filtro de edição entra por EditionSociety (1 join, lookup por PK) em
+        # vez de Speech→Debate→Round — metade do fan-out por linha de speech
+        team_scores = (
+            select(
+                Speech.debate_id.label("debate_id"),
+                DebatePosition.edition_society_id.label("es_id"),
+                func.sum(Speech.score).label("team_total"),
+                func.count(Speech.id).label("speech_count"),
+            )
+            .join(
+                DebatePosition,
+                and_(
+                    DebatePosition.debate_id == Speech.debate_id,
+                    DebatePosition.position == Speech.position,
+                ),
+            )
+            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
+            .where(
+                EditionSociety.edition_id == edition_id,
+                Speech.score.is_not(None),
+            )
+            .group_by(Speech.debate_id, DebatePosition.edition_society_id)
+            .having(func.count(Speech.id) == 2)  # exige 2 discursos com nota
+            .cte("team_scores")
+        )
+
+        # rank do nosso time: 1 + quantas equipes do MESMO debate somaram mais.
+        # Escalar correlacionado em vez de rank() OVER: evita ordenar a janela
+        # inteira de todas as equipes da edição só para filtrar a nossa linha
+        ts2 = team_scores.alias("ts2")
+        rank_expr = (
+            select(func.count() + 1)
+            .where(
+                ts2.c.debate_id == team_scores.c.debate_id,
+                ts2.c.team_total > team_scores.c.team_total,
+            )
+            .scalar_subquery()
+        )
+
+        our_scores = (
+            select(
+                team_scores.c.debate_id,
+                rank_expr.label("rnk"),
+                team_scores.c.team_total.label("our_total"),
+            )
+            .where(team_scores.c.es_id == edsoc_id)
+        ).cte("our_scores")
+
+        # our_rank: rank/points do nosso time em cada debate (LEFT JOIN para casos sem 2 falas)
+        points_expr = case(
+            (our_scores.c.rnk == 1, literal(3)),
+            (our_scores.c.rnk == 2, literal(2)),
+            (our_scores.c.rnk == 3, literal(1)),
+            else_=literal(0),
+        )
+
+        our_rank = (
+            select(
+                our_scores.c.debate_id,
+                our_scores.c.rnk,
+                points_expr.label("points"),
+                our_scores.c.our_total.label("our_total"),
+            )
+        ).cte("our_rank")
+
+        # teams_map: por debate, position->short_name (todas as equipes do debate)
+        teams_map = (
+            select(
+                DebatePosition.debate_id.label("debate_id"),
+                func.jsonb_object_agg(
+                    DebatePosition.position,
+                    Society.short_name
+                ).label("teams_json")
+            )
+            .select_from(DebatePosition)  # <-- define o FROM
+            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
+            .join(Society, Society.id == EditionSociety.society_id)
+            .group_by(DebatePosition.debate_id)
+        ).cte("teams_map")
+
+        # totals_map: por debate, position->total (somente quando time tem 2 falas)
+        totals_map = (
+            select(
+                DebatePosition.debate_id.label("debate_id"),
+                func.jsonb_object_agg(
+                    DebatePosition.position,
+                    team_scores.c.team_total
+                ).label("totals_json")
+            )
+            .select_from(DebatePosition)  # <-- define o FROM
+            .join(
+                team_scores,
+                DebatePosition.edition_society_id == team_scores.c.es_id
+            )
+            .group_by(DebatePosition.debate_id)
+        ).cte("totals_map")
+
+        # our_speakers: nomes + score, ordenados por sequence_in_team (sempre retornamos nomes; score pode ser NULL)
+        our_speakers = (
+            select(
+                Speech.debate_id.label("debate_id"),
+                func.jsonb_agg(
+                    aggregate_order_by(
+                        func.jsonb_build_object(
+                            literal("name"), Person.full_name,
+                            literal("score"), Speech.score,
+                        ),
+                        Speech.sequence_in_team.asc(),  # <— ordena dentro do jsonb_agg
+                    )
+                ).label("speakers_json")
+            )
+            .select_from(Speech)  # define FROM explícito p/ evitar ambiguidade no JOIN
+            .join(EditionMember, EditionMember.id == Speech.edition_member_id)
+            .join(Person, Person.id == EditionMember.person_id)
+            .join(
+                DebatePosition,
+                and_(
+                    DebatePosition.debate_id == Speech.debate_id,
+                    DebatePosition.position == Speech.position,
+                )
+            )
+            .where(DebatePosition.edition_society_id == edsoc_id)
+            .group_by(Speech.debate_id)
+        ).cte("our_speakers")
+
+        # SELECT final: o payload inteiro vira UM documento JSONB montado no
+        # banco (inclusive a regra "totals só quando published"); o psycopg
+        # devolve a lista de dicts já decodificada, sem loop de montagem aqui
+        entry_json = func.jsonb_build_object(
+            literal("round_id"), our_debates.c.round_id,
+            literal("round_number"), our_debates.c.round_number,
+            literal("round_name"), our_debates.c.round_name,
+            literal("round_date"), our_debates.c.round_date,
+            literal("scores_published"), our_debates.c.scores_published,
+            literal("silent"), our_debates.c.silent,
+            literal("debate_id"), our_debates.c.debate_id,
+            literal("deb_number"), our_debates.c.debate_number,
+            literal("position"), our_debates.c.our_position,
+            literal("rank"), our_rank.c.rnk,
+            literal("points"), our_rank.c.points,
+            # se não publicados, não exibimos totals (fica null no JSON)
+            literal("totals"), case(
+                (our_debates.c.scores_published, totals_map.c.totals_json)
+            ),
+            literal("teams"), func.coalesce(teams_map.c.teams_json, func.jsonb_build_object()),
+            literal("our_speakers"), func.coalesce(
+                our_speakers.c.speakers_json, cast(literal("[]"), JSONB)
+            ),
+        )
+
+        history = sess.execute(
+            select(
+                func.jsonb_agg(
+                    aggregate_order_by(
+                        entry_json,
+                        our_debates.c.round_number.asc(),
+                        our_debates.c.debate_number.asc(),
+                    )
+                )
+            )
+            .select_from(our_debates)
+            .join(our_rank, our_rank.c.debate_id == our_debates.c.debate_id, isouter=True)
+            .join(teams_map, teams_map.c.debate_id == our_debates.c.debate_id, isouter=True)
+            .join(totals_map, totals_map.c.debate_id == our_debates.c.debate_id, isouter=True)
+            .join(our_speakers, our_speakers.c.debate_id == our_debates.c.debate_id, isouter=True)
+        ).scalar() or []
+
+        return render_template(
+            "society_history.html",
+            society={"short": short_name, "full": full_name},
+            debaters=debaters_table,
+            history=history
+        )
+
+    finally:
+        sess.close()
+
+
+
+@app.post("/soc/escalacao")
+@society_required
+def post_escalacao():
+    """Salva/atualiza escalação (2 debatedores) para o debate/posição da sociedade.
+       Regras:
+       - debate/posição devem pertencer à sociedade logada;
+       - debatedores devem ser EditionMember(kind='debater') da MESMA sociedade/edição;
+       - não pode escolher a mesma pessoa pros dois slots;
+       - se já houver score (resultado lançado) naquele debate/posição, BLOQUEIA edição.
+    """
+    data = request.form or request.json or {}
+    debate_id = int(data.get("debate_id", 0))
+    s1_id = int(data.get("s1_id", 0))
+    s2_id = int(data.get("s2_id", 0))
+
+    if not debate_id or not s1_id or not s2_id:
+        flash("Preencha os dois debatedores.", "error")
+        return redirect(request.referrer or url_for("page_escalacao"))
+
+    if s1_id == s2_id:
+        flash("Os dois debatedores devem ser pessoas diferentes.", "error")
+        return redirect(request.referrer or url_for("page_escalacao"))
+
+    sess = SessionLocal()
+    try:
+        edsoc_id, edition_id, base_soc_id = _get_soc_context(sess)
+        if not edsoc_id:
+            return redirect(url_for("login"))
+
+        # Verifica que o debate pertence à mesma edição e contém a sociedade (descobre a posição)
+        pos_row = sess.execute(
+            select(DebatePosition.position, Debate.round_id)
+            .join(Debate, Debate.id == DebatePosition.debate_id)
+            .where(
+                DebatePosition.debate_id == debate_id,
+                DebatePosition.edition_society_id == edsoc_id
+            )
+        ).first()
+        if not pos_row:
+            flash("Você não possui permissão para este debate.", "error")
+            return redirect(request.referrer or url_for("page_escalacao"))
+        position, round_id = pos_row
+
+        # Valida os DOIS debatedores numa query só: EditionMember(kind='debater')
+        # da mesma sociedade/edição
+        valid_ids = set(sess.scalars(
+            select(EditionMember.id)
+            .join(Person, Person.id == EditionMember.person_id)
+            .where(
+                EditionMember.id.in_([s1_id, s2_id]),
+                EditionMember.edition_id == edition_id,
+                EditionMember.kind == cast(literal("debater"), MemberKindEnum),
+                Person.society_id == base_soc_id,
+            )
+        ).all())
+        if not {s1_id, s2_id} <= valid_ids:
+            flash("Debatedores inválidos para esta sociedade/edição.", "error")
+            return redirect(request.referrer or url_for("page_escalacao"))
+
+        # BLOQUEIO prometido no docstring: resultado já lançado nesta posição
+        # => escalação fechada (probe curto no índice parcial de scored)
+        locked = sess.execute(
+            select(literal(1))
+            .where(
+                Speech.debate_id == debate_id,
+                Speech.position == position,
+                Speech.score.is_not(None),
+            )
+            .limit(1)
+        ).first() is not None
+        if locked:
+            flash("Resultado já lançado para esta posição — escalação bloqueada.", "error")
+            return redirect(request.referrer or url_for("page_escalacao"))
+
+        # Upsert da escalação num comando só: ON CONFLICT no slot único
+        # (debate_id, position, sequence_in_team) dispensa o SELECT prévio
+        stmt = pg_insert(Speech).values([
+            {
+                "debate_id": debate_id,
+                "position": position,
+                "sequence_in_team": seq,
+                "edition_member_id": member_id,
+                "score": None,
+            }
+            for seq, member_id in ((1, s1_id), (2, s2_id))
+        ])
+        # o WHERE cobre a corrida com api_save_results entre o probe acima e o
+        # upsert: linha que ganhou score nesse meio-tempo fica intocada
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_speech_slot",
+            set_={"edition_member_id": stmt.excluded.edition_member_id, "score": None},
+            where=Speech.score.is_(None),
+        )
+        sess.execute(stmt)
+        sess.commit()
+        flash("Escalação salva com sucesso.", "success")
+        # redireciona mantendo a rodada atual
+        return redirect(url_for("home"))
+    finally:
+        sess.close()
+
+
+@app.get("/pairings")
+def view_pairings():
+    sess = SessionLocal()
+    try:
+        edition = get_current_edition(sess)
+        if not edition:
+            return render_template("pairings.html", rounds=[])
+
+        # Rodadas sem nenhum resultado: NOT EXISTS curto-circuita na 1ª nota
+        # encontrada, em vez de agregar todas as speeches da rodada
+        # sem LIMIT nos sublinks: LIMIT impede o pull-up para (anti/semi) join
+        # e força SubPlan por rodada; EXISTS já para na primeira linha
+        any_scored = (
+            select(literal(1))
+            .select_from(Debate)
+            .join(Speech, Speech.debate_id == Debate.id)
+            .where(
+                Debate.round_id == Round.id,   # correlaciona com Round externo
+                Speech.score.is_not(None),
+            )
+        )
+        has_debate = (
+            select(literal(1))
+            .select_from(Debate)
+            .where(Debate.round_id == Round.id)
+        )
+        # subquery escalar correlacionada: todas as posições da rodada num
+        # array JSON já ordenado (debate, posição) — uma ida só ao banco
+        pairs_json = (
+            select(
+                func.jsonb_agg(
+                    aggregate_order_by(
+                        func.jsonb_build_object(
+                            literal("debate_id"), Debate.id,
+                            literal("number"), Debate.number_in_round,
+                            literal("position"), DebatePosition.position,
+                            literal("short_name"), Society.short_name,
+                        ),
+                        Debate.number_in_round.asc(),
+                        DebatePosition.position_order.asc(),
+                    )
+                )
+            )
+            .select_from(Debate)
+            .join(DebatePosition, DebatePosition.debate_id == Debate.id)
+            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
+            .join(Society, Society.id == EditionSociety.society_id)
+            .where(Debate.round_id == Round.id)  # correlaciona com Round externo
+            .scalar_subquery()
+        )
+
+        r_rows = sess.execute(
+            select(
+                Round.id,
+                Round.number,
+                Round.scheduled_date,
+                pairs_json.label("pairs_json"),
+            )
+            .where(
+                Round.edition_id == edition.id,
+                ~exists(any_scored),
+                exists(has_debate),
+            )
+            .order_by(Round.number.asc())
+        ).all()
+
+        # Remonta a estrutura aninhada do template: o array já vem ordenado
+        # por (debate, posição), então basta um groupby em streaming
+        rounds = []
+        for (r_id, r_num, r_date, pairs) in r_rows:
+            debates = []
+            for (d_id, d_num), d_group in groupby(
+                pairs or [], key=lambda p: (p["debate_id"], p["number"])
+            ):
+                debates.append({
+                    "id": d_id,
+                    "number": d_num,
+                    "positions": [
+                        {"position": p["position"], "short_name": p["short_name"]}
+                        for p in d_group
+                    ],
+                })
+            rounds.append({"id": r_id, "number": r_num, "date": r_date, "debates": debates})
+
+        return render_template("pairings.html", rounds=rounds)
+    finally:
+        sess.close()
+
+
+# cache da página de resultados: o payload só muda quando api_save_results
+# grava (invalidação explícita); o TTL cobre mudanças feitas fora do app.
+# A parte dependente do usuário (is_staff) é aplicada por request, no final
+_RESULTS_TTL = 30.0
+_results_cache = {}
+
+
+def _invalidate_results_cache():
+    _results_cache.clear()
+
+
+def _render_results(rounds_base, is_staff):
+    return render_template("results_list.html", rounds=[
+        {**r, "scores_published": r["scores_published"] or is_staff}
+        for r in rounds_base
+    ])
+
+
+@app.get("/resultados")
+def view_results_list():
+    sess = SessionLocal()
+    try:
+        edition = get_current_edition(sess)
+        if not edition:
+            return render_template("results_list.html", rounds=[])
+
+        is_staff = session.get('auth_kind') == 'staff'
+        hit = _results_cache.get(edition.id)
+        if hit and time.monotonic() - hit[0] < _RESULTS_TTL:
+            return _render_results(hit[1], is_staff)
+
+        # 1) Rodadas completas, não-silent (1 query)
+        sp_scored = func.count(Speech.id).filter(Speech.score.is_not(None)).label("sp_scored")
+        deb_cnt = func.count(distinct(Debate.id)).label("deb_count")
+
+        r_rows = sess.execute(
+            select(
+                Round.id,
+                Round.number,
+                Round.name,
+                Round.scheduled_date,
+                Round.scores_published,
+                deb_cnt,
+                sp_scored,  # <- speeches com score != NULL
+            )
+            .join(Debate, Debate.round_id == Round.id, isouter=True)
+            .join(Speech, Speech.debate_id == Debate.id, isouter=True)
+            .where(Round.edition_id == edition.id, Round.silent.is_(False))
+            .group_by(Round.id)
+            .having(deb_cnt > 0)
+            .having(sp_scored == 8 * func.count(distinct(Debate.id)))
+            .order_by(Round.number.asc())
+        ).mappings().all()
+
+        round_ids = [row["id"] for row in r_rows]
+        if not round_ids:
+            _results_cache[edition.id] = (time.monotonic(), [])
+            return render_template("results_list.html", rounds=[])
+
+        # Agregações penduradas no debate como subqueries escalares
+        # correlacionadas: o Postgres só agrega os debates das rodadas
+        # listadas, em vez de materializar hash-aggregates globais por tabela
+        # e juntá-los de volta com 4 outer joins
+
+        # posições (sociedade por posição), ordenadas
+        positions_json = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(
+                            literal("position"), DebatePosition.position,
+                            literal("short_name"), Society.short_name,
+                        ),
+                        DebatePosition.position_order.asc(),
+                    )
+                )
+            )
+            .select_from(DebatePosition)
+            .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
+            .join(Society, Society.id == EditionSociety.society_id)
+            .where(DebatePosition.debate_id == Debate.id)
+            .scalar_subquery()
+        )
+
+        # speeches já agrupados por posição: {"OG": [fala1, fala2], ...},
+        # cada array ordenado por seq — a view só completa posições vazias
+        _speech_arrs = (
+            select(
+                Speech.position.label("position"),
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(
+                            literal("seq"), Speech.sequence_in_team,
+                            literal("name"), Person.full_name,
+                            literal("score"), Speech.score,
+                        ),
+                        Speech.sequence_in_team.asc(),
+                    )
+                ).label("arr"),
+            )
+            .select_from(Speech)
+            .join(EditionMember, EditionMember.id == Speech.edition_member_id)
+            .join(Person, Person.id == EditionMember.person_id)
+            .where(Speech.debate_id == Debate.id)
+            .group_by(Speech.position)
+            .correlate(Debate)
+        ).subquery("speech_arrs")
+
+        speeches_json = (
+            select(func.json_object_agg(_speech_arrs.c.position, _speech_arrs.c.arr))
+            .select_from(_speech_arrs)
+            .scalar_subquery()
+        )
+
+        # juízes (chair + wings) como objetos estruturados — a formatação
+        # "SdD — Nome" fica no template, sem concat/trim de string por linha
+        chair_role = cast(literal("chair"), JudgeRoleEnum)
+        wing_role = cast(literal("wing"), JudgeRoleEnum)
+        judge_obj = func.json_build_object(
+            literal("soc"), func.trim(func.coalesce(Society.short_name, literal(""))),
+            literal("name"), Person.full_name,
+        )
+        _judges_base = (
+            select(
+                func.json_agg(
+                    aggregate_order_by(judge_obj, Person.full_name.asc())
+                ).filter(DebateJudge.role == chair_role),
+            )
+            .select_from(DebateJudge)
+            .join(EditionMember, EditionMember.id == DebateJudge.edition_member_id)
+            .join(Person, Person.id == EditionMember.person_id)
+            .outerjoin(Society, Society.id == Person.society_id)
+            .where(DebateJudge.debate_id == Debate.id)
+        )
+        chair_json = _judges_base.scalar_subquery()
+        wings_json = (
+            _judges_base.with_only_columns(
+                func.json_agg(
+                    aggregate_order_by(judge_obj, Person.full_name.asc())
+                ).filter(DebateJudge.role == wing_role)
+            )
+            .scalar_subquery()
+        )
+
+        # totals + rank por posição (somente quando há 2 falas com nota),
+        # num único objeto {"totals": {...}, "ranks": {...}} por debate
+        team_totals = (
+            select(
+                Speech.position.label("position"),
+                func.sum(Speech.score).label("total"),
+                func.rank().over(
+                    order_by=func.sum(Speech.score).desc(),
+                ).label("rnk"),
+            )
+            .where(Speech.debate_id == Debate.id, Speech.score.is_not(None))
+            .group_by(Speech.position)
+            .having(func.count(Speech.id) == 2)  # exige 2 falas com nota por posição
+            .correlate(Debate)
+        ).subquery("team_totals")
+
+        totals_ranks_json = (
+            select(
+                func.json_build_object(
+                    literal("totals"), func.json_object_agg(
+                        team_totals.c.position, team_totals.c.total
+                    ),
+                    literal("ranks"), func.json_object_agg(
+                        team_totals.c.position, team_totals.c.rnk
+                    ),
+                )
+            )
+            .select_from(team_totals)
+            .scalar_subquery()
+        )
+
+        # 2) Debates prontos por rodada, com todas as agregações (1 query)
+        debates_rows = sess.execute(
+            select(
+                Debate.round_id,
+                Debate.id.label("debate_id"),
+                Debate.number_in_round.label("debate_number"),
+                positions_json.label("positions_json"),
+                speeches_json.label("speeches_json"),
+                chair_json.label("chair"),
+                wings_json.label("wings"),
+                totals_ranks_json.label("totals_ranks_json"),
+            )
+            .where(Debate.round_id.in_(round_ids))
+            .order_by(Debate.round_id.asc(), Debate.number_in_round.asc())
+            # streaming: monta por janela de linhas em vez de materializar tudo
+            .execution_options(yield_per=500, stream_results=True)
+        ).mappings()
+
+        # 3) Montagem final em memória (linear, sem next()/buscas aninhadas)
+        by_round = {
+            row["id"]: {
+                "id": row["id"],
+                "number": row["number"],
+                "date": row["scheduled_date"],
+                "scores_published": bool(row["scores_published"]),
+                "debates": [],
+            }
+            for row in r_rows
+        }
+
+        for row in debates_rows:
+            rid = row["round_id"]
+            # reconstruir estruturas simples p/ a view
+            # positions_json já vem ordenado por position_order (aggregate_order_by)
+            positions = [
+                {"position": obj["position"], "short_name": obj["short_name"]}
+                for obj in (row["positions_json"] or [])
+            ]
+
+            # speeches já vêm agrupados/ordenados do banco; só garante as 4 chaves
+            speeches_by_pos = {posk: [] for posk in POSITIONS}
+            speeches_by_pos.update(row["speeches_json"] or {})
+
+            # totals/ranks já vêm prontos do banco (window rank por debate);
+            # posições sem 2 falas com nota ficam com total None e rank no fim
+            totals_ranks = row["totals_ranks_json"] or {}
+            totals_json = totals_ranks.get("totals") or {}
+            ranks_json = totals_ranks.get("ranks") or {}
+            totals_map = {
+                posk: (int(totals_json[posk]) if posk in totals_json else None)
+                for posk in POSITIONS
+            }
+            rank_by_pos = {posk: int(r) for posk, r in ranks_json.items()}
+            next_rank = len(rank_by_pos) + 1
+            for posk in POSITIONS:
+                if posk not in rank_by_pos:
+                    rank_by_pos[posk] = next_rank
+                    next_rank += 1
+
+            by_round[rid]["debates"].append({
+                "id": row["debate_id"],
+                "number": row["debate_number"],
+                "positions": positions,
+                "speeches": speeches_by_pos,
+                "judges": {"chair": row["chair"] or [], "wings": row["wings"] or []},
+                "rank_by_pos": rank_by_pos,
+                "total_by_pos": totals_map,
+            })
+
+        # r_rows já veio ordenado por Round.number e dicts preservam inserção
+        rounds_base = []
+        for rid, rdata in by_round.items():
+            rdata["debates"].sort(key=lambda d: d["number"])
+            rounds_base.append({
+                "id": rid,
+                "number": rdata["number"],
+                "date": rdata["date"],
+                "scores_published": rdata["scores_published"],
+                "debates": rdata["debates"],
+            })
+
+        _results_cache[edition.id] = (time.monotonic(), rounds_base)
+        return _render_results(rounds_base, is_staff)
+
+    finally:
+        sess.close()
+
+class LoginUser(UserMixin):
+    """ Wrapper para integrar User do banco com Flask-Login """
+    def __init__(self, db_user: User):
+        self.id = str(db_user.id)
+        self.email = db_user.email
+        self.role = db_user.role
+        self.is_active_flag = db_user.is_active
+
+    @property
+    def is_active(self):  # Flask-Login integration
+        return True if self.is_active_flag else False
+
+@login_manager.user_loader
+def load_user(user_id):
+    sess = SessionLocal()
+    try:
+        u = sess.get(User, int(user_id))
+        return LoginUser(u) if u else None
+    finally:
+        sess.close()
+
+def roles_required(*roles):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            # precisa estar logado como staff
+            if session.get('auth_kind') != 'staff':
+                flash("Faça login como staff.", "error")
+                return redirect(url_for('login', next=request.path))
+            # precisa ter um dos papéis exigidos
+            user_role = session.get('role')
+            if roles and user_role not in roles:
+                return render_template("403.html"), 403
+            return fn(*args, **kwargs)
+        return wrapped
+    return decorator
+
+# cache curto entre requests: o polling do placar resolve a edição a cada hit
+# e edições novas só surgem uma vez por ano — 10s de janela é irrelevante
+_EDITION_TTL = 10.0
+_edition_cache = {"ts": 0.0, "edition": None}
+
+def get_current_edition(sess):
+    # memoizado em flask.g: no máximo 1 consulta por request
+    if "current_edition" not in g:
+        now = time.monotonic()
+        if now - _edition_cache["ts"] < _EDITION_TTL:
+            g.current_edition = _edition_cache["edition"]
+        else:
+            # lambda_stmt: pula a reconstrução/compilação do select a cada request
+            g.current_edition = sess.execute(
+                lambda_stmt(lambda: select(Edition).order_by(Edition.year.desc()).limit(1))
+            ).scalar_one_or_none()
+            _edition_cache["edition"] = g.current_edition
+            _edition_cache["ts"] = now
+    return g.current_edition
+
+# ---------- Rotas de login/logout unificadas ----------
+
+# hash "dummy" comparado quando o e-mail não existe: a resposta demora o mesmo
+# que um login com senha errada (sem oráculo de timing para enumerar e-mails)
+_DUMMY_HASH = generate_password_hash("nao-e-uma-senha")
+
+# e-mails que falharam lookup recentemente: pula o SELECT no martelamento de
+# credential stuffing (o dummy bcrypt ainda roda, preservando o timing).
+# Chave (mode, email): o mesmo e-mail pode existir como staff e não como
+# sociedade (ou vice-versa) — errar a aba não pode travar o login certo.
+# Efeito colateral aceito: conta criada/reativada dentro da janela do TTL
+# após uma tentativa falha ainda é recusada por até 60s nesse mode.
+_FAILED_EMAIL_TTL = 60.0
+_failed_emails = {}
+
+
+def _email_known_missing(mode, email):
+    ts = _failed_emails.get((mode, email))
+    return ts is not None and time.monotonic() - ts < _FAILED_EMAIL_TTL
+
+
+def _remember_missing_email(mode, email):
+    if len(_failed_emails) > 4096:
+        _failed_emails.clear()
+    _failed_emails[(mode, email)] = time.monotonic()
+
+
+@app.get("/login")
+def login():
+    return render_template("login_unified.html")
+
+
+@app.post("/login")
+def do_login():
+    mode = (request.form.get("mode") or "staff").lower()  # 'staff' ou 'society'
+    email = (request.form.get("email") or "").strip().lower()
+    password = request.form.get("password") or ""
+    nxt = request.args.get("next") or url_for("home")
+
+    if not email or not password:
+        flash("Informe e-mail e senha.", "error")
+        return redirect(url_for("login", next=nxt))
+
+    dbs = SessionLocal()
+    try:
+        if mode == "staff":
+            u = None
+            if not _email_known_missing("staff", email):
+                u = dbs.execute(
+                    select(User).where(User.email == email, User.is_active == True)
+                ).scalar_one_or_none()
+                if not u:
+                    _remember_missing_email("staff", email)
+            if not u:
+                check_password_hash(_DUMMY_HASH, password)  # equaliza o timing
+                flash("E-mail ou senha inválidos.", "error")
+                return redirect(url_for("login", next=nxt))
+            if not check_password_hash(u.password_hash, password):
+                flash("E-mail ou senha inválidos.", "error")
+                return redirect(url_for("login", next=nxt))
+            session.clear()
+            session["auth_kind"] = "staff"
+            session["user_id"] = u.id
+            session["role"] = u.role
+            return redirect(nxt)
+
+        # mode == "society"
+        acc = None
+        if not _email_known_missing("society", email):
+            acc = dbs.execute(
+                select(SocietyAccount).where(SocietyAccount.email == email, SocietyAccount.is_active == True)
+            ).scalar_one_or_none()
+            if not acc:
+                _remember_missing_email("society", email)
+        if not acc:
+            check_password_hash(_DUMMY_HASH, password)  # equaliza o timing
+            flash("E-mail ou senha inválidos.", "error")
+            return redirect(url_for("login", next=nxt))
+        if not check_password_hash(acc.password_hash, password):
+            flash("E-mail ou senha inválidos.", "error")
+            return redirect(url_for("login", next=nxt))
+        session.clear()
+        session["auth_kind"] = "society"
+        session["soc_acc_id"] = acc.id
+        session["edition_society_id"] = acc.edition_society_id
+        # ids derivados gravados no cookie: _get_soc_context não precisa de SELECT
+        ids = dbs.execute(
+            select(EditionSociety.edition_id, EditionSociety.society_id)
+            .where(EditionSociety.id == acc.edition_society_id)
+        ).first()
+        if ids:
+            session["soc_edition_id"], session["soc_society_id"] = ids
+        return redirect(nxt)
+    finally:
+        dbs.close()
+
+@app.post("/logout")
+def logout():
+    session.clear()
+    return redirect(url_for("login"))
+
+
+@app.get("/")
+def home():
+    # página inicial (templates/index.html)
+    return render_template("index.html")
+
+
+# --- Página Inserir Resultados (somente diretor/admin) ---
+@app.get("/results")
+@roles_required("director", "admin")
+def results_form():
+    sess = SessionLocal()
+    try:
+        edition = get_current_edition(sess)
+        if not edition:
+            flash("Nenhuma edição encontrada.", "error")
+            return redirect(url_for("home"))
+
+        # >>> CONTAR APENAS SPEECHES COM SCORE != NULL POR DEBATE
+        sp_scored = func.count(Speech.id).filter(Speech.score.is_not(None)).label("sp_scored")
+
+        # rodadas + completude numa query só: bool_and(debate tem exatamente
+        # 8 notas) por rodada; rodada sem debates vira False via coalesce
+        deb_counts_sq = (
+            select(Debate.round_id.label("round_id"), sp_scored)
+            .join(Speech, Speech.debate_id == Debate.id, isouter=True)
+            .group_by(Debate.round_id, Debate.id)
+        ).subquery()
+        rounds_with_status = sess.execute(
+            select(
+                Round.id,
+                Round.number,
+                Round.name,
+                func.coalesce(
+                    func.bool_and(deb_counts_sq.c.sp_scored == 8), literal(False)
+                ).label("completed"),
+            )
+            .join(deb_counts_sq, deb_counts_sq.c.round_id == Round.id, isouter=True)
+            .where(Round.edition_id == edition.id)
+            .group_by(Round.id)
+            .order_by(Round.number.asc())
+        ).all()
+
+        # a lista inicial de debates vem via /api/round_debates no front
+        return render_template("results.html", rounds=rounds_with_status, debates=[])
+
+    finally:
+        sess.close()
+# --- APIs auxiliares para o form ---
+
+@app.get("/api/round_debates")
+@roles_required("director", "admin")
+def api_round_debates():
+    round_id = int(request.args.get("round_id"))
+    sess = SessionLocal()
+    try:
+        # o payload inteiro sai pronto do banco como texto JSON — nenhuma
+        # montagem de dicts nem re-serialização aqui; lambda_stmt segue
+        # cacheando a compilação (forma fixa, round_id como bind param)
+        def _build():
+            deb = (
+                select(
+                    Debate.id.label("id"),
+                    Debate.number_in_round.label("number_in_round"),
+                    (func.count(Speech.id).filter(Speech.score.is_not(None)) == 8)
+                    .label("completed"),
+                )
+                .select_from(Debate)
+                .outerjoin(Speech, Speech.debate_id == Debate.id)
+                .where(Debate.round_id == round_id)
+                .group_by(Debate.id)
+            ).subquery("deb")
+
+            return select(
+                cast(
+                    func.jsonb_build_object(
+                        literal("data"),
+                        func.coalesce(
+                            func.jsonb_agg(
+                                aggregate_order_by(
+                                    func.jsonb_build_object(
+                                        literal("id"), deb.c.id,
+                                        literal("number_in_round"), deb.c.number_in_round,
+                                        literal("completed"), deb.c.completed,
+                                    ),
+                                    deb.c.number_in_round.asc(),
+                                )
+                            ),
+                            cast(literal("[]"), JSONB),
+                        ),
+                    ),
+                    String,
+                )
+            ).select_from(deb)
+
+        payload = sess.execute(lambda_stmt(_build)).scalar()
+        return Response(payload, mimetype="application/json")
+    finally:
+        sess.close()
+
+@app.get("/api/debate_detail")
+@roles_required("director", "admin")  # mantenha protegido
+def api_debate_detail():
+    debate_id = request.args.get("debate_id", type=int)
+    if not debate_id:
+        return jsonify({"error": "debate_id inválido"}), 400
+
+    sess = SessionLocal()
+    try:
+        # ---------------------------------------------
+        # Query 1: meta + posições + lineup (1 ida só)
+        # forma fixa (só debate_id varia): lambda_stmt pula a reconstrução e
+        # recompilação do select a cada request deste endpoint quente
+        # ---------------------------------------------
+        def _build_pos_stmt():
+            # lineup por posição neste debate
+            lineup_subq = (
+                select(
+                    Speech.position.label("position"),
+                    func.array_agg(
+                        aggregate_order_by(Speech.edition_member_id, Speech.sequence_in_team.asc())
+                    ).label("lineup"),
+                )
+                .select_from(Speech)
+                .where(Speech.debate_id == debate_id)
+                .group_by(Speech.position)
+                .subquery()
+            )
+
+            return (
+                select(
+                    Round.edition_id,                             # para queries seguintes
+                    DebatePosition.position,
+                    DebatePosition.edition_society_id,
+                    EditionSociety.society_id,                    # para filtrar juízes de fora
+                    Society.short_name,
+                    lineup_subq.c.lineup,                         # [edition_member_id, ...] ordenado
+                )
+                .select_from(DebatePosition)
+                .join(Debate, Debate.id == DebatePosition.debate_id)
+                .join(Round, Round.id == Debate.round_id)
+                .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
+                .join(Society, Society.id == EditionSociety.society_id)
+                .join(lineup_subq, lineup_subq.c.position == DebatePosition.position, isouter=True)
+                .where(DebatePosition.debate_id == debate_id)
+                .order_by(DebatePosition.position_order.asc())
+            )
+
+        pos_rows = sess.execute(lambda_stmt(_build_pos_stmt)).all()
+        if not pos_rows:
+            return jsonify({"error": "Debate não encontrado"}), 404
+
+        # extrai edition_id / societies do debate e monta payload "positions"
+        edition_id = pos_rows[0][0]
+        positions = []
+        edsoc_ids = []
+        team_soc_ids = set()
+
+        for (_edition_id, position, edsoc_id, base_soc_id, short_name, lineup) in pos_rows:
+            positions.append({
+                "position": position,
+                "team_short": short_name,
+                "edition_society_id": edsoc_id,
+                "lineup": list(lineup or []),  # já ordenado por sequence_in_team
+            })
+            edsoc_ids.append(edsoc_id)
+            team_soc_ids.add(base_soc_id)
+
+        # ---------------------------------------------
+        # Query 2: debatedores elegíveis (4 sociedades)
+        # ---------------------------------------------
+        EM = aliased(EditionMember)
+        debaters = sess.execute(
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(
+                            literal("edition_member_id"), EM.id,
+                            literal("name"), Person.full_name,
+                            literal("soc"), Society.short_name,
+                        ),
+                        Society.short_name.asc(), Person.full_name.asc(),
+                    )
+                )
+            )
+            .select_from(EM)
+            .join(Person, Person.id == EM.person_id)
+            .join(Society, Society.id == Person.society_id)
+            .where(
+                EM.edition_id == edition_id,
+                EM.kind == cast(literal("debater"), MemberKindEnum),  # <-- cast para o enum
+                Person.society_id.in_(team_soc_ids),
+            )
+        ).scalar() or []
+
+        # ---------------------------------------------
+        # Query 3: juízes elegíveis (fora das 4 sociedades)
+        # ---------------------------------------------
+        J = aliased(EditionMember)
+        judges = sess.execute(
+            select(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object(
+                            literal("edition_member_id"), J.id,
+                            literal("name"), Person.full_name,
+                            literal("soc"), Society.short_name,
+                        ),
+                        Society.short_name.asc(), Person.full_name.asc(),
+                    )
+                )
+            )
+            .select_from(J)
+            .join(Person, Person.id == J.person_id)
+            .join(Society, Society.id == Person.society_id)   # mantém a mesma semântica do seu código
+            .where(
+                J.edition_id == edition_id,
+                J.kind == cast(literal("judge"), MemberKindEnum),     # <-- cast para o enum
+                ~Person.society_id.in_(team_soc_ids),          # exclui as 4 sociedades
+            )
+        ).scalar() or []
+
+        return fast_json({"data": {
+            "positions": positions,
+            "debaters": debaters,
+            "judges": judges
+        }})
+
+    finally:
+        sess.close()
+
+
+@app.post("/api/results")
+@roles_required("director", "admin")
+def api_save_results():
+    payload = request.get_json(force=True, silent=False)
+    debate_id = int(payload.get("debate_id"))
+    speeches = payload.get("speeches") or []
+    judges = payload.get("judges") or {}
+
+    sess = SessionLocal()
+    try:
+        # validar debate -> edição
+        round_row = sess.execute(
+            select(Round.id, Round.edition_id)
+            .join(Debate, Debate.round_id == Round.id)
+            .where(Debate.id == debate_id)
+        ).one_or_none()
+        if not round_row:
+            return jsonify(error="Debate inexistente"), 400
+        _, edition_id = round_row
+
+        # pré-valida todos os membros citados no payload numa ida só (id -> kind)
+        member_ids = set()
+        for item in speeches:
+            for key in ("s1_id", "s2_id"):
+                if item.get(key):
+                    member_ids.add(int(item[key]))
+        if judges.get("chair"):
+            member_ids.add(int(judges["chair"]))
+        for w in (judges.get("wings") or []):
+            if w:
+                member_ids.add(int(w))
+
+        valid_kinds = {}
+        if member_ids:
+            valid_kinds = dict(sess.execute(
+                select(EditionMember.id, EditionMember.kind)
+                .where(
+                    EditionMember.id.in_(member_ids),
+                    EditionMember.edition_id == edition_id,
+                )
+            ).all())
+
+        def valid_em(em_id, kind=None):
+            if not em_id:
+                return False
+            found = valid_kinds.get(int(em_id))
+            return found is not None and (kind is None or found == kind)
+
+        # valida tudo primeiro e acumula as linhas; o upsert sai num único
+        # INSERT .. ON CONFLICT no final (sem SELECT prévio nem ORM por slot)
+        valid_positions = set(POSITIONS)
+        speech_rows = []
+        for item in speeches:
+            pos = (item.get("position") or "").upper()
+            s1_id = item.get("s1_id")
+            s1_score = item.get("s1_score")
+            s2_id = item.get("s2_id")
+            s2_score = item.get("s2_score")
+
+            if pos not in valid_positions:
+                return jsonify(error=f"Posição inválida: {pos}"), 400
+
+            if not (valid_em(s1_id, "debater") and valid_em(s2_id, "debater")):
+                return jsonify(error=f"Debaters inválidos para {pos}"), 400
+
+            # scores inteiros 50–100
+            def vs(x):
+                try:
+                    xi = int(x)
+                    return 50 <= xi <= 100
+                except Exception:
+                    return False
+
+            if not (vs(s1_score) and vs(s2_score)):
+                return jsonify(error=f"Scores inválidos (50–100) em {pos}"), 400
+
+            speech_rows.append({
+                "debate_id": debate_id,
+                "position": pos,
+                "sequence_in_team": 1,
+                "edition_member_id": int(s1_id),
+                "score": int(s1_score),
+            })
+            speech_rows.append({
+                "debate_id": debate_id,
+                "position": pos,
+                "sequence_in_team": 2,
+                "edition_member_id": int(s2_id),
+                "score": int(s2_score),
+            })
+
+        # upsert das (até) 8 speeches num comando só
+        if speech_rows:
+            up = pg_insert(Speech).values(speech_rows)
+            up = up.on_conflict_do_update(
+                constraint="uq_speech_slot",
+                set_={
+                    "edition_member_id": up.excluded.edition_member_id,
+                    "score": up.excluded.score,
+                },
+            )
+            sess.execute(up)
+
+        # juízes: chair + até 2 wings (todos distintos entre si)
+        chair_id = judges.get("chair")
+        wings = [w for w in (judges.get("wings") or []) if w]
+
+        if chair_id and not valid_em(chair_id, "judge"):
+            return jsonify(error="Chair inválido"), 400
+        for w in wings:
+            if not valid_em(w, "judge"):
+                return jsonify(error="Wing inválido"), 400
+        # não permitir duplicados (chair igual a wing, ou wings repetidos)
+        all_judges = [int(chair_id)] + [int(w) for w in wings] if chair_id else [int(w) for w in wings]
+        if len(all_judges) != len(set(all_judges)):
+            return jsonify(error="Juízes duplicados não são permitidos"), 400
+        if len(wings) > 2:
+            return jsonify(error="No máximo 2 wings"), 400
+
+        # zera todos os juízes do debate e recria em lote (1 DELETE + 1 INSERT)
+        sess.execute(
+            DebateJudge.__table__.delete().where(DebateJudge.debate_id == debate_id)
+        )
+        judge_rows = [
+            {"debate_id": debate_id, "edition_member_id": int(chair_id), "role": "chair"}
+        ] if chair_id else []
+        judge_rows += [
+            {"debate_id": debate_id, "edition_member_id": int(w), "role": "wing"}
+            for w in wings
+        ]
+        if judge_rows:
+            sess.execute(insert(DebateJudge), judge_rows)
+
+        sess.commit()
+        # resultados novos mudam o placar e a página de resultados
+        _invalidate_standings_cache()
+        _invalidate_results_cache()
+        return jsonify(ok=True)
+    except Exception as e:
+        sess.rollback()
+        return jsonify(error=str(e)), 500
+    finally:
+        sess.close()
+
+
+
+# cache curto do standings (a query analítica mais pesada do app): o placar
+# só muda quando api_save_results grava, que invalida explicitamente; o TTL
+# é rede de segurança para outros processos/workers alterarem o banco
+_STANDINGS_TTL = 30.0
+_standings_cache = {}
+
+
+def _invalidate_standings_cache():
+    _standings_cache.clear()
+
+
+@app.get("/api/standings")
+def api_standings(debug=False):
+    sess = SessionLocal()
+    try:
+        is_staff = session.get('auth_kind') == 'staff'
+        edition_param = request.args.get("edition", "current")
+
+        if edition_param == "current":
+            edition = get_current_edition(sess)
+        else:
+            edition = sess.execute(
+                select(Edition).where(Edition.year == int(edition_param))
+            ).scalar_one_or_none()
+
+        if not edition:
+            return empty_data_response()
+
+        cache_key = (edition.id, is_staff)
+        hit = _standings_cache.get(cache_key)
+        if hit and time.monotonic() - hit[0] < _STANDINGS_TTL:
+            data = hit[1]
+            return fast_json({"data": data}) if not debug else data
+
+        # NOTA: nada de lambda_stmt aqui — is_staff entra via literal() dentro
+        # do case, e o rastreio de closure do lambda rejeita chamadas de função
+        # sobre variáveis capturadas (ArgumentError na análise). O cache de
+        # compilação do engine já cobre este select; só roda em miss do cache
+        edition_id = edition.id
+
+        def _build_final():
+            # ------------------------------------------------------------
+            # 1) Totais por (debate, posição/equipe) com contagem de falas
+            #    (Speech -> Debate -> Round) + DebatePosition para mapear ES
+            # ------------------------------------------------------------
+            team_scores_per_team_sq = (
+                select(
+                    Speech.debate_id.label("debate_id"),
+                    Speech.position.label("position"),
+                    DebatePosition.edition_society_id.label("es_id"),
+                    func.sum(Speech.score).label("team_total"),
+                    func.count(Speech.id).label("speech_count"),
+                    Round.scores_published.label("scores_published"),
+                )
+                .join(Debate, Debate.id == Speech.debate_id)
+                .join(Round, Round.id == Debate.round_id)
+                .join(
+                    DebatePosition,
+                    and_(
+                        DebatePosition.debate_id == Speech.debate_id,
+                        DebatePosition.position == Speech.position,
+                    ),
+                )
+                .where(
+                    Round.edition_id == edition_id,
+                    Round.silent.is_(False),
+                    Speech.score.is_not(None),
+                )
+                .group_by(
+                    Speech.debate_id,
+                    Speech.position,
+                    DebatePosition.edition_society_id,
+                    Round.scores_published,
+                )
+                .subquery()
+            )
+
+            # ------------------------------------------------------------
+            # 2) rank() + completude na MESMA janela: debate completo = 4 equipes
+            #    com speech_count=2 na partição — dispensa o re-agregado/join de
+            #    "debates completos" (um HashAggregate a menos no plano)
+            #    IMPORTANTE: a janela fica AQUI (subquery), não no nível agregado
+            # ------------------------------------------------------------
+            ranked_sq = (
+                select(
+                    team_scores_per_team_sq.c.debate_id,
+                    team_scores_per_team_sq.c.es_id,
+                    team_scores_per_team_sq.c.team_total,
+                    team_scores_per_team_sq.c.scores_published,
+                    func.rank().over(
+                        partition_by=team_scores_per_team_sq.c.debate_id,
+                        order_by=team_scores_per_team_sq.c.team_total.desc(),
+                    ).label("rnk"),
+                    (
+                        func.count()
+                        .filter(team_scores_per_team_sq.c.speech_count == 2)
+                        .over(partition_by=team_scores_per_team_sq.c.debate_id) == 4
+                    ).label("complete"),
+                )
+                .subquery()
+            )
+
+            # mapeamento 3-2-1-0 + contagens
+            points_expr = case(
+                (ranked_sq.c.rnk == 1, literal(3)),
+                (ranked_sq.c.rnk == 2, literal(2)),
+                (ranked_sq.c.rnk == 3, literal(1)),
+                else_=literal(0),
+            )
+            firsts_expr = case((ranked_sq.c.rnk == 1, literal(1)), else_=literal(0))
+            seconds_expr = case((ranked_sq.c.rnk == 2, literal(1)), else_=literal(0))
+            sp_expr = case(
+                (
+                    or_(
+                        ranked_sq.c.scores_published.is_(True),
+                        literal(is_staff)
+                    ),
+                    ranked_sq.c.team_total
+                ),
+                else_=literal(0),
+            )
+
+            # ------------------------------------------------------------
+            # 4) Agregado final por equipe (EditionSociety)
+            #    (agora SIM podemos somar, pois o rank ficou na subquery)
+            # ------------------------------------------------------------
+            standings_sq = (
+                select(
+                    ranked_sq.c.es_id.label("es_id"),
+                    func.sum(points_expr).label("points"),
+                    func.sum(sp_expr).label("speaker_points"),
+                    func.sum(firsts_expr).label("firsts"),
+                    func.sum(seconds_expr).label("seconds"),
+                    func.count().label("debates"),
+                )
+                .where(ranked_sq.c.complete.is_(True))  # só debates completos pontuam
+                .group_by(ranked_sq.c.es_id)
+                .subquery()
+            )
+
+            # ------------------------------------------------------------
+            # 5) Base (todas as sociedades inscritas != "Independente")
+            #    + LEFT JOIN com o agregado e ordenação final no banco
+            # ------------------------------------------------------------
+            base_q = (
+                select(
+                    EditionSociety.id.label("es_id"),
+                    Society.id.label("society_id"),
+                    # já sai limpo do banco: o loop de materialização não
+                    # precisa de .strip() por linha
+                    func.trim(func.coalesce(Society.short_name, literal(""))).label("short_name"),
+                    # coluna crua só para o desempate do ORDER BY: NULL continua
+                    # ordenando por último, como antes do trim/coalesce
+                    Society.short_name.label("short_name_raw"),
+                )
+                .join(Society, Society.id == EditionSociety.society_id)
+                .where(
+                    EditionSociety.edition_id == edition_id,
+                    func.trim(func.coalesce(Society.short_name, "")) != "Independente",
+                )
+                .subquery()
+            )
+
+            # labels compartilhados entre SELECT e ORDER BY: o Postgres ordena
+            # pelo alias de saída em vez de reavaliar cada COALESCE no Sort
+            points_col = func.coalesce(standings_sq.c.points, 0).label("points")
+            # SUM(team_total) é SUM(SUM(score)) → numeric no PG, que o psycopg
+            # devolve como Decimal e o orjson rejeita; cast para int no banco
+            sp_col = cast(func.coalesce(standings_sq.c.speaker_points, 0), Integer).label("speaker_points")
+            firsts_col = func.coalesce(standings_sq.c.firsts, 0).label("firsts")
+            seconds_col = func.coalesce(standings_sq.c.seconds, 0).label("seconds")
+
+            return (
+                select(
+                    base_q.c.es_id.label("edsoc_id"),  # <— novo
+                    base_q.c.society_id,
+                    base_q.c.short_name,
+                    points_col,
+                    sp_col,
+                    firsts_col,
+                    seconds_col,
+                    func.coalesce(standings_sq.c.debates, 0).label("debates"),
+                )
+                .join(standings_sq, standings_sq.c.es_id == base_q.c.es_id, isouter=True)
+                .order_by(
+                    points_col.desc(),
+                    sp_col.desc(),
+                    firsts_col.desc(),
+                    seconds_col.desc(),
+                    base_q.c.short_name_raw.asc(),
+                )
+            )
+
+        # .mappings() + dict(m): as colunas já chegam com o nome e o tipo
+        # finais (trim e coalesce feitos no banco), então a materialização
+        # é uma cópia rasa por linha — sem int()/strip() em Python
+        data = [dict(m) for m in sess.execute(_build_final()).mappings()]
+        _standings_cache[cache_key] = (time.monotonic(), data)
+        return fast_json({"data": data}) if not debug else data
+    finally:
+        sess.close()
+
+@app.get("/api/next_pairings")
+def api_next_pairings():
+    """
+    Pareamentos (OG/OO/CG/CO) da próxima rodada sem resultados.
+    Retorna apenas short_name nas posições.
+    """
+    sess = SessionLocal()
+    try:
+        # --- edição alvo ---
+        edition_param = request.args.get("edition", "current")
+        if edition_param == "current":
+            edition = get_current_edition(sess)
+        else:
+            edition = sess.execute(
+                select(Edition).where(Edition.year == int(edition_param))
+            ).scalar_one_or_none()
+
+        if not edition:
+            return empty_data_response()
+
+        # ------------------------------------------------------------
+        # Rodada-alvo + pareamentos numa ida só: CTE com a primeira rodada
+        # sem resultados (NÃO existe Speech com score != NULL), já juntada
+        # aos debates/posições da rodada
+        # forma fixa (só edition_id varia): lambda_stmt reaproveita a árvore
+        # compilada entre requests em vez de remontar CTE+joins a cada hit
+        # ------------------------------------------------------------
+        edition_id = edition.id
+
+        def _build_pairings():
+            # sem LIMIT dentro do EXISTS: um LIMIT no sublink impede o Postgres
+            # de fazer pull-up para hash anti-join e força um SubPlan por
+            # rodada; EXISTS já para na primeira linha de qualquer forma
+            any_scored_subq = (
+                select(literal(1))   # <---- aqui é literal(1), não func.literal
+                .select_from(Debate)
+                .join(Speech, Speech.debate_id == Debate.id)
+                .where(
+                    Debate.round_id == Round.id,   # correlacionada com Round externo
+                    Speech.score.is_not(None),
+                )
+            )
+            next_round_cte = (
+                select(Round.id.label("round_id"), Round.number.label("round_number"))
+                .where(
+                    Round.edition_id == edition_id,
+                    ~exists(any_scored_subq)       # NOT EXISTS
+                )
+                .order_by(Round.number.asc())
+                .limit(1)
+            ).cte("next_round")
+
+            return (
+                select(
+                    next_round_cte.c.round_number,
+                    Debate.id.label("debate_id"),
+                    Debate.number_in_round.label("debate_number"),
+                    DebatePosition.position,
+                    # fallback "D<id>" calculado no banco (NULLIF cobre short vazio)
+                    func.coalesce(
+                        func.nullif(Society.short_name, literal("")),
+                        func.concat(literal("D"), cast(Debate.id, String)),
+                    ).label("team_name"),
+                )
+                .select_from(next_round_cte)
+                .join(Debate, Debate.round_id == next_round_cte.c.round_id)
+                .join(DebatePosition, DebatePosition.debate_id == Debate.id)
+                .join(EditionSociety, EditionSociety.id == DebatePosition.edition_society_id)
+                .join(Society, Society.id == EditionSociety.society_id)
+                .order_by(Debate.number_in_round.asc())
+            )
+
+        rows = sess.execute(lambda_stmt(_build_pairings)).all()
+
+        if not rows:
+            # sem rodada aberta (ou rodada ainda sem pareamentos)
+            return empty_data_response()
+
+        next_round_number = rows[0][0]
+
+        # pré-aloca os slots por debate (sem factory de defaultdict por chave);
+        # as linhas já chegam ORDER BY number_in_round e dicts preservam a
+        # ordem de inserção — nada a reordenar em Python
+        debate_numbers = {d_id: d_num for (_rnum, d_id, d_num, _pos, _tn) in rows}
+        by_debate = {d_id: {posk: "" for posk in POSITIONS} for d_id in debate_numbers}
+        for _rnum, d_id, _d_num, pos, team_name in rows:
+            by_debate[d_id][pos] = team_name
+
+        data = [
+            {
+                "round_number": next_round_number,
+                "debate_number": d_num,
+                "positions": by_debate[d_id],
+            }
+            for d_id, d_num in debate_numbers.items()
+        ]
+
+        return fast_json({"data": data})
+    finally:
+        sess.close()
+
+@app.get("/admin")
+@roles_required("director", "admin")
+def admin_panel():
+    sess = SessionLocal()
+    try:
+        edition = get_current_edition(sess)
+        if not edition:
+            return render_template("admin_panel.html", rounds=[])
+        rows = sess.execute(
+            select(Round.id, Round.number, Round.name,
+                   Round.scheduled_date.label("date"),
+                   Round.scores_published, Round.silent)
+            .where(Round.edition_id == edition.id)
+            .order_by(Round.number.asc())
+        ).mappings().all()
+        rounds = [
+            {
+                **row,
+                "scores_published": bool(row["scores_published"]),
+                "silent": bool(row["silent"]),
+            }
+            for row in rows
+        ]
+        return render_template("admin_panel.html", rounds=rounds)
+    finally:
+        sess.close()
+
+
+@app.post("/api/rounds/<int:round_id>/settings")
+@roles_required("director", "admin")
+def api_update_round_settings(round_id: int):
+    """
+    Body JSON (qualquer um dos dois campos; ambos opcionais):
+    { "scores_published": true|false, "silent": true|false }
+    """
+    payload = request.get_json(silent=True) or {}
+    changes = {}
+    if "scores_published" in payload:
+        changes["scores_published"] = bool(payload["scores_published"])
+    if "silent" in payload:
+        changes["silent"] = bool(payload["silent"])
+
+    sess = SessionLocal()
+    try:
+        if changes:
+            # UPDATE ... RETURNING: uma ida só (sem o SELECT do sess.get nem
+            # o maquinário de unit-of-work para um toggle de dois campos)
+            row = sess.execute(
+                update(Round)
+                .where(Round.id == round_id)
+                .values(**changes)
+                .returning(Round.id, Round.scores_published, Round.silent)
+            ).first()
+            sess.commit()
+            if row:
+                # divulgação/silent mudam o placar e a página de resultados
+                _invalidate_standings_cache()
+                _invalidate_results_cache()
+        else:
+            row = sess.execute(
+                select(Round.id, Round.scores_published, Round.silent)
+                .where(Round.id == round_id)
+            ).first()
+
+        if not row:
+            return jsonify({"error": "Rodada não encontrada"}), 404
+
+        return jsonify({
+            "ok": True,
+            "data": {
+                "id": row.id,
+                "scores_published": row.scores_published,
+                "silent": row.silent
+            }
+        })
+    finally:
+        sess.close()
+
+
+@app.post("/api/rounds/settings/bulk")
+@roles_required("director", "admin")
+def api_update_round_settings_bulk():
+    """
+    Body JSON: lista de estados completos por rodada (sync, não patch):
+    [{ "id": 1, "scores_published": true, "silent": false }, ...]
+    """
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list) or not payload:
+        return jsonify({"error": "Esperada lista não-vazia de rodadas"}), 400
+
+    try:
+        rows = [
+            {
+                "b_id": int(item["id"]),
+                "b_sp": bool(item["scores_published"]),
+                "b_silent": bool(item["silent"]),
+            }
+            for item in payload
+        ]
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "Cada item precisa de id, scores_published e silent"}), 400
+
+    sess = SessionLocal()
+    try:
+        # um único UPDATE parametrizado executado como executemany: uma ida
+        # com N parameter sets em vez de N requests/commits do toggle unitário.
+        # Direto na connection Core e contra a tabela: Session.execute sobre a
+        # entidade desvia para o caminho ORM "bulk update by primary key", que
+        # exige chave 'id' nos dicts e não aceita o WHERE com bindparam
+        rounds_t = Round.__table__
+        sess.connection().execute(
+            update(rounds_t)
+            .where(rounds_t.c.id == bindparam("b_id"))
+            .values(scores_published=bindparam("b_sp"), silent=bindparam("b_silent")),
+            rows,
+        )
+        sess.commit()
+        _invalidate_standings_cache()
+        _invalidate_results_cache()
+        return jsonify({"ok": True, "updated": len(rows)})
+    finally:
+        sess.close()
+
+
+if __name__ == "__main__":
+    app.run(debug=True)
+
@@ -1,6 +1,6 @@
-from db import engine
-from models import Base
-
-if __name__ == "__main__":
-    Base.metadata.create_all(bind=engine)
-    print("Tabelas criadas.")
+from db import engine
+from models import Base
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    print("Tabelas criadas.")
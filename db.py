@@ -1,20 +1,28 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, DeclarativeBase
-
-load_dotenv()  # lê .env em dev
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL não definida.")
-
-# pool_pre_ping ajuda a recuperar conexões “adormecidas”
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-
-SessionLocal = scoped_session(
-    sessionmaker(bind=engine, autoflush=False, autocommit=False)
-)
-
-class Base(DeclarativeBase):
-    pass
+import os
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, scoped_session, DeclarativeBase
+
+load_dotenv()  # lê .env em dev
+
+DATABASE_URL = os.getenv("DATABASE_URL")
+if not DATABASE_URL:
+    raise RuntimeError("DATABASE_URL não definida.")
+
+# pool_pre_ping ajuda a recuperar conexões “adormecidas”;
+# pool_recycle evita ficar com conexões mais velhas que o timeout do servidor
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    pool_recycle=1800,
+)
+
+# expire_on_commit=False: ler atributos depois do commit não re-SELECIONA
+SessionLocal = scoped_session(
+    sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False)
+)
+
+class Base(DeclarativeBase):
+    pass
@@ -1,235 +1,282 @@
-from sqlalchemy import (
-    Integer, String, Date, DateTime, Enum, ForeignKey, UniqueConstraint,
-    func, CheckConstraint, Boolean, Text
-)
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from db import Base
-
-# ----------------------------
-# Entidades de base e edição
-# ----------------------------
-
-class Society(Base):
-    __tablename__ = "societies"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    name: Mapped[str] = mapped_column(String(150), unique=True, nullable=False)
-    short_name: Mapped[str] = mapped_column(String(40), unique=True, nullable=True)
-    city: Mapped[str] = mapped_column(String(80), nullable=True)
-
-    members: Mapped[list["Person"]] = relationship(back_populates="society", cascade="all,save-update")
-
-
-class Edition(Base):
-    __tablename__ = "editions"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    year: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
-    name: Mapped[str] = mapped_column(String(150), nullable=False)
-
-    societies: Mapped[list["EditionSociety"]] = relationship(back_populates="edition", cascade="all,delete-orphan")
-
-
-class EditionSociety(Base):
-    """
-    Inscrição da sociedade em uma edição específica.
-    """
-    __tablename__ = "edition_societies"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id", ondelete="CASCADE"), nullable=False, index=True)
-    society_id: Mapped[int] = mapped_column(ForeignKey("societies.id", ondelete="RESTRICT"), nullable=False, index=True)
-
-    edition: Mapped["Edition"] = relationship(back_populates="societies")
-    society: Mapped["Society"] = relationship()
-
-    # 1 conta (login) por sociedade/edição
-    society_account: Mapped["SocietyAccount"] = relationship(
-        back_populates="edition_society", cascade="all,delete-orphan", uselist=False
-    )
-
-    __table_args__ = (
-        UniqueConstraint("edition_id", "society_id", name="uq_edition_society"),
-    )
-
-# ----------------------------
-# Pessoas e inscrição por edição
-# ----------------------------
-
-class Person(Base):
-    """
-    Pessoa vinculada a uma Society 'base'.
-    """
-    __tablename__ = "persons"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    full_name: Mapped[str] = mapped_column(String(150), nullable=False, index=True)
-    email: Mapped[str | None] = mapped_column(String(150), nullable=True, unique=False)
-    society_id: Mapped[int | None] = mapped_column(ForeignKey("societies.id", ondelete="SET NULL"), nullable=True)
-
-    society: Mapped["Society"] = relationship(back_populates="members")
-    edition_memberships: Mapped[list["EditionMember"]] = relationship(back_populates="person", cascade="all,delete-orphan")
-
-
-RoleEnum = Enum("normal", "director", "admin", name="role_enum")
-MemberKindEnum = Enum("debater", "judge", name="member_kind_enum")
-
-class EditionMember(Base):
-    """
-    Inscrição da pessoa em uma edição com um papel específico (debater ou judge).
-    """
-    __tablename__ = "edition_members"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id", ondelete="CASCADE"), nullable=False, index=True)
-    person_id: Mapped[int] = mapped_column(ForeignKey("persons.id", ondelete="CASCADE"), nullable=False, index=True)
-    kind: Mapped[str] = mapped_column(MemberKindEnum, nullable=False)  # 'debater' | 'judge'
-
-    person: Mapped["Person"] = relationship(back_populates="edition_memberships")
-    edition: Mapped["Edition"] = relationship()
-
-    __table_args__ = (
-        UniqueConstraint("edition_id", "person_id", "kind", name="uq_member_per_kind"),
-    )
-
-# ----------------------------
-# Autenticação (staff) e conta por sociedade
-# ----------------------------
-
-class User(Base):
-    """
-    Usuários 'staff' para autenticação no app (normal / director / admin).
-    """
-    __tablename__ = "users"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    email: Mapped[str] = mapped_column(String(150), unique=True, nullable=False, index=True)
-    password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
-    role: Mapped[str] = mapped_column(RoleEnum, nullable=False, default="normal")
-    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true")
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-
-
-class SocietyAccount(Base):
-    """
-    Conta de acesso da sociedade (uma por EditionSociety).
-    Permite a própria sociedade realizar ações (ex.: escalar debatedores da rodada).
-    """
-    __tablename__ = "society_accounts"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    edition_society_id: Mapped[int] = mapped_column(
-        ForeignKey("edition_societies.id", ondelete="CASCADE"), nullable=False, unique=True, index=True
-    )
-    email: Mapped[str] = mapped_column(String(150), unique=True, nullable=False, index=True)
-    password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
-    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true")
-    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
-
-    edition_society: Mapped["EditionSociety"] = relationship(back_populates="society_account")
-
-# ----------------------------
-# Rodadas, debates e posições
-# ----------------------------
-
-PositionEnum = Enum("OG", "OO", "CG", "CO", name="position_enum")
-
-class Round(Base):
-    __tablename__ = "rounds"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id", ondelete="CASCADE"), nullable=False, index=True)
-    number: Mapped[int] = mapped_column(Integer, nullable=False)  # 1, 2, 3, ...
-    name: Mapped[str | None] = mapped_column(String(80), nullable=True)
-    scheduled_date: Mapped[Date | None] = mapped_column(Date, nullable=True)  # só o dia
-
-    motion: Mapped[str | None] = mapped_column(Text, nullable=True)        # moção da rodada
-    infoslide: Mapped[str | None] = mapped_column(Text, nullable=True)     # infoslide da rodada
-    silent: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
-    # Novo: controlar divulgação das notas (speaker points)
-    scores_published: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
-
-    edition: Mapped["Edition"] = relationship()
-    debates: Mapped[list["Debate"]] = relationship(back_populates="round", cascade="all,delete-orphan")
-
-    __table_args__ = (
-        UniqueConstraint("edition_id", "number", name="uq_round_per_edition"),
-    )
-
-
-class Debate(Base):
-    """
-    Um debate dentro de uma rodada.
-    """
-    __tablename__ = "debates"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    round_id: Mapped[int] = mapped_column(ForeignKey("rounds.id", ondelete="CASCADE"), nullable=False, index=True)
-    number_in_round: Mapped[int] = mapped_column(Integer, nullable=False)  # ex.: 1 ou 2
-
-    round: Mapped["Round"] = relationship(back_populates="debates")
-    positions: Mapped[list["DebatePosition"]] = relationship(back_populates="debate", cascade="all,delete-orphan")
-    judges: Mapped[list["DebateJudge"]] = relationship(back_populates="debate", cascade="all,delete-orphan")
-    speeches: Mapped[list["Speech"]] = relationship(back_populates="debate", cascade="all,delete-orphan")
-
-    __table_args__ = (
-        UniqueConstraint("round_id", "number_in_round", name="uq_debate_per_round"),
-    )
-
-class DebatePosition(Base):
-    """
-    Mapeia qual sociedade (daquela edição) ocupa OG/OO/CG/CO.
-    """
-    __tablename__ = "debate_positions"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    debate_id: Mapped[int] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"), nullable=False, index=True)
-    position: Mapped[str] = mapped_column(PositionEnum, nullable=False)
-    edition_society_id: Mapped[int] = mapped_column(ForeignKey("edition_societies.id", ondelete="RESTRICT"), nullable=False, index=True)
-
-    debate: Mapped["Debate"] = relationship(back_populates="positions")
-    team: Mapped["EditionSociety"] = relationship()
-
-    __table_args__ = (
-        UniqueConstraint("debate_id", "position", name="uq_position_per_debate"),
-    )
-
-# ----------------------------
-# Speeches (quem falou e nota)
-# ----------------------------
-
-class Speech(Base):
-    """
-    Armazena os 2 discursos por posição (OG/OO/CG/CO), com orador e nota 50–100.
-    - sequence_in_team: 1 ou 2 (primeiro e segundo discurso daquele lado)
-    - score inteiro (nullable até a publicação das notas)
-    Regra prática:
-      * 'Escalação' antes do debate = criar os dois registros com edition_member_id e score = NULL.
-      * 'Resultado' = preencher os scores (50–100) nos mesmos registros.
-    """
-    __tablename__ = "speeches"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    debate_id: Mapped[int] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"), nullable=False, index=True)
-    position: Mapped[str] = mapped_column(PositionEnum, nullable=False)  # OG/OO/CG/CO
-    sequence_in_team: Mapped[int] = mapped_column(Integer, nullable=False)  # 1 ou 2
-    edition_member_id: Mapped[int] = mapped_column(ForeignKey("edition_members.id", ondelete="RESTRICT"), nullable=False, index=True)
-    score: Mapped[int | None] = mapped_column(Integer, nullable=True)
-
-    debate: Mapped["Debate"] = relationship(back_populates="speeches")
-    speaker: Mapped["EditionMember"] = relationship()
-
-    __table_args__ = (
-        UniqueConstraint("debate_id", "position", "sequence_in_team", name="uq_speech_slot"),
-        CheckConstraint("sequence_in_team IN (1, 2)", name="ck_sequence_1_or_2"),
-        CheckConstraint("(score IS NULL) OR (score BETWEEN 50 AND 100)", name="ck_score_50_100"),
-    )
-
-# ----------------------------
-# Juízes do debate
-# ----------------------------
-
-JudgeRoleEnum = Enum("chair", "wing", name="judge_role_enum")
-
-class DebateJudge(Base):
-    __tablename__ = "debate_judges"
-    id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    debate_id: Mapped[int] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"), nullable=False, index=True)
-    edition_member_id: Mapped[int] = mapped_column(ForeignKey("edition_members.id", ondelete="RESTRICT"), nullable=False, index=True)
-    role: Mapped[str] = mapped_column(JudgeRoleEnum, nullable=False)  # chair | wing
-
-    debate: Mapped["Debate"] = relationship(back_populates="judges")
-    judge: Mapped["EditionMember"] = relationship()
-
-    __table_args__ = (
-        UniqueConstraint("debate_id", "edition_member_id", name="uq_judge_once_per_debate"),
-    )
+from sqlalchemy import (
+    Integer, String, Date, DateTime, Enum, ForeignKey, UniqueConstraint,
+    func, CheckConstraint, Boolean, Text, SmallInteger, Computed, Index, text
+)
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from db import Base
+
+# ----------------------------
+# Entidades de base e edição
+# ----------------------------
+
+class Society(Base):
+    __tablename__ = "societies"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(150), unique=True, nullable=False)
+    short_name: Mapped[str] = mapped_column(String(40), unique=True, nullable=True)
+    city: Mapped[str] = mapped_column(String(80), nullable=True)
+
+    members: Mapped[list["Person"]] = relationship(back_populates="society", cascade="all,save-update")
+
+
+class Edition(Base):
+    __tablename__ = "editions"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, nullable=False, unique=True)
+    name: Mapped[str] = mapped_column(String(150), nullable=False)
+
+    societies: Mapped[list["EditionSociety"]] = relationship(back_populates="edition", cascade="all,delete-orphan")
+
+
+class EditionSociety(Base):
+    """
+    Inscrição da sociedade em uma edição específica.
+    """
+    __tablename__ = "edition_societies"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id", ondelete="CASCADE"), nullable=False, index=True)
+    society_id: Mapped[int] = mapped_column(ForeignKey("societies.id", ondelete="RESTRICT"), nullable=False, index=True)
+
+    edition: Mapped["Edition"] = relationship(back_populates="societies")
+    society: Mapped["Society"] = relationship(lazy="joined")
+
+    # 1 conta (login) por sociedade/edição
+    society_account: Mapped["SocietyAccount"] = relationship(
+        back_populates="edition_society", cascade="all,delete-orphan", uselist=False
+    )
+
+    __table_args__ = (
+        UniqueConstraint("edition_id", "society_id", name="uq_edition_society"),
+    )
+
+# ----------------------------
+# Pessoas e inscrição por edição
+# ----------------------------
+
+class Person(Base):
+    """
+    Pessoa vinculada a uma Society 'base'.
+    """
+    __tablename__ = "persons"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    full_name: Mapped[str] = mapped_column(String(150), nullable=False, index=True)
+    email: Mapped[str | None] = mapped_column(String(150), nullable=True, unique=False)
+    society_id: Mapped[int | None] = mapped_column(ForeignKey("societies.id", ondelete="SET NULL"), nullable=True)
+
+    society: Mapped["Society"] = relationship(back_populates="members")
+    edition_memberships: Mapped[list["EditionMember"]] = relationship(back_populates="person", cascade="all,delete-orphan")
+
+
+RoleEnum = Enum("normal", "director", "admin", name="role_enum")
+MemberKindEnum = Enum("debater", "judge", name="member_kind_enum")
+
+class EditionMember(Base):
+    """
+    Inscrição da pessoa em uma edição com um papel específico (debater ou judge).
+    """
+    __tablename__ = "edition_members"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id", ondelete="CASCADE"), nullable=False, index=True)
+    person_id: Mapped[int] = mapped_column(ForeignKey("persons.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind: Mapped[str] = mapped_column(MemberKindEnum, nullable=False)  # 'debater' | 'judge'
+
+    person: Mapped["Person"] = relationship(back_populates="edition_memberships")
+    edition: Mapped["Edition"] = relationship()
+
+    __table_args__ = (
+        UniqueConstraint("edition_id", "person_id", "kind", name="uq_member_per_kind"),
+        # filtro quente: membros de uma edição por papel
+        Index("ix_em_edition_kind", "edition_id", "kind"),
+    )
+
+# ----------------------------
+# Autenticação (staff) e conta por sociedade
+# ----------------------------
+
+class User(Base):
+    """
+    Usuários 'staff' para autenticação no app (normal / director / admin).
+    """
+    __tablename__ = "users"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    email: Mapped[str] = mapped_column(String(150), unique=True, nullable=False, index=True)
+    password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    role: Mapped[str] = mapped_column(RoleEnum, nullable=False, default="normal")
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true")
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class SocietyAccount(Base):
+    """
+    Conta de acesso da sociedade (uma por EditionSociety).
+    Permite a própria sociedade realizar ações (ex.: escalar debatedores da rodada).
+    """
+    __tablename__ = "society_accounts"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    edition_society_id: Mapped[int] = mapped_column(
+        ForeignKey("edition_societies.id", ondelete="CASCADE"), nullable=False, unique=True, index=True
+    )
+    email: Mapped[str] = mapped_column(String(150), unique=True, nullable=False, index=True)
+    password_hash: Mapped[str] = mapped_column(String(255), nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, nullable=False, default=True, server_default="true")
+    created_at: Mapped[DateTime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    edition_society: Mapped["EditionSociety"] = relationship(back_populates="society_account")
+
+# ----------------------------
+# Rodadas, debates e posições
+# ----------------------------
+
+PositionEnum = Enum("OG", "OO", "CG", "CO", name="position_enum")
+
+# coluna gerada com o ordinal OG=1/OO=2/CG=3/CO=4: permite ORDER BY indexado
+# em vez de reavaliar um CASE por linha nas consultas
+_POSITION_ORDER_SQL = (
+    "CASE position WHEN 'OG' THEN 1 WHEN 'OO' THEN 2 "
+    "WHEN 'CG' THEN 3 WHEN 'CO' THEN 4 ELSE 99 END"
+)
+
+class Round(Base):
+    __tablename__ = "rounds"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    edition_id: Mapped[int] = mapped_column(ForeignKey("editions.id", ondelete="CASCADE"), nullable=False, index=True)
+    number: Mapped[int] = mapped_column(Integer, nullable=False)  # 1, 2, 3, ...
+    name: Mapped[str | None] = mapped_column(String(80), nullable=True)
+    scheduled_date: Mapped[Date | None] = mapped_column(Date, nullable=True)  # só o dia
+
+    motion: Mapped[str | None] = mapped_column(Text, nullable=True)        # moção da rodada
+    infoslide: Mapped[str | None] = mapped_column(Text, nullable=True)     # infoslide da rodada
+    silent: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
+    # Novo: controlar divulgação das notas (speaker points)
+    scores_published: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default="false")
+
+    edition: Mapped["Edition"] = relationship()
+    debates: Mapped[list["Debate"]] = relationship(back_populates="round", cascade="all,delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("edition_id", "number", name="uq_round_per_edition"),
+        # listagens públicas filtram por edição + silent
+        Index("ix_round_edition_silent", "edition_id", "silent"),
+    )
+
+
+class Debate(Base):
+    """
+    Um debate dentro de uma rodada.
+    """
+    __tablename__ = "debates"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    round_id: Mapped[int] = mapped_column(ForeignKey("rounds.id", ondelete="CASCADE"), nullable=False, index=True)
+    number_in_round: Mapped[int] = mapped_column(Integer, nullable=False)  # ex.: 1 ou 2
+
+    round: Mapped["Round"] = relationship(back_populates="debates")
+    positions: Mapped[list["DebatePosition"]] = relationship(back_populates="debate", cascade="all,delete-orphan")
+    judges: Mapped[list["DebateJudge"]] = relationship(back_populates="debate", cascade="all,delete-orphan")
+    speeches: Mapped[list["Speech"]] = relationship(back_populates="debate", cascade="all,delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint("round_id", "number_in_round", name="uq_debate_per_round"),
+        # listagem ordenada dos debates de uma rodada vira index-only scan
+        Index("ix_debate_round_num", "round_id", "number_in_round"),
+    )
+
+class DebatePosition(Base):
+    """
+    Mapeia qual sociedade (daquela edição) ocupa OG/OO/CG/CO.
+    """
+    __tablename__ = "debate_positions"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    debate_id: Mapped[int] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"), nullable=False, index=True)
+    position: Mapped[str] = mapped_column(PositionEnum, nullable=False)
+    position_order: Mapped[int] = mapped_column(
+        SmallInteger, Computed(_POSITION_ORDER_SQL, persisted=True), index=True
+    )
+    edition_society_id: Mapped[int] = mapped_column(ForeignKey("edition_societies.id", ondelete="RESTRICT"), nullable=False, index=True)
+
+    debate: Mapped["Debate"] = relationship(back_populates="positions")
+    # many-to-one quente: carregar junto evita N+1 em quem andar
+    # DebatePosition.team.society via ORM (os endpoints quentes usam
+    # selects de colunas e não passam por aqui)
+    team: Mapped["EditionSociety"] = relationship(lazy="joined")
+
+    __table_args__ = (
+        UniqueConstraint("debate_id", "position", name="uq_position_per_debate"),
+        # cobre o join (edition_society_id, debate_id) sem tocar a heap
+        Index(
+            "ix_pos_edsoc_debate", "edition_society_id", "debate_id",
+            postgresql_include=["position"],
+        ),
+        # caminho inverso: lookup por (debate_id, position) já trazendo o time
+        Index(
+            "ix_pos_debate_position", "debate_id", "position",
+            postgresql_include=["edition_society_id"],
+        ),
+    )
+
+# ----------------------------
+# Speeches (quem falou e nota)
+# ----------------------------
+
+class Speech(Base):
+    """
+    Armazena os 2 discursos por posição (OG/OO/CG/CO), com orador e nota 50–100.
+    - sequence_in_team: 1 ou 2 (primeiro e segundo discurso daquele lado)
+    - score inteiro (nullable até a publicação das notas)
+    Regra prática:
+      * 'Escalação' antes do debate = criar os dois registros com edition_member_id e score = NULL.
+      * 'Resultado' = preencher os scores (50–100) nos mesmos registros.
+    """
+    __tablename__ = "speeches"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    debate_id: Mapped[int] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"), nullable=False, index=True)
+    position: Mapped[str] = mapped_column(PositionEnum, nullable=False)  # OG/OO/CG/CO
+    sequence_in_team: Mapped[int] = mapped_column(Integer, nullable=False)  # 1 ou 2
+    edition_member_id: Mapped[int] = mapped_column(ForeignKey("edition_members.id", ondelete="RESTRICT"), nullable=False, index=True)
+    score: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    debate: Mapped["Debate"] = relationship(back_populates="speeches")
+    speaker: Mapped["EditionMember"] = relationship()
+
+    __table_args__ = (
+        UniqueConstraint("debate_id", "position", "sequence_in_team", name="uq_speech_slot"),
+        CheckConstraint("sequence_in_team IN (1, 2)", name="ck_sequence_1_or_2"),
+        CheckConstraint("(score IS NULL) OR (score BETWEEN 50 AND 100)", name="ck_score_50_100"),
+        # probes de "existe nota?" filtram por (debate_id, score)
+        Index("ix_speech_debate_score", "debate_id", "score"),
+        # índices parciais: só linhas com nota, usados pelo locked/used_count
+        Index(
+            "ix_speech_scored_debate_pos", "debate_id", "position",
+            postgresql_where=text("score IS NOT NULL"),
+        ),
+        Index(
+            "ix_speech_member_scored", "edition_member_id",
+            postgresql_where=text("score IS NOT NULL"),
+        ),
+        # cobre as agregações de resultados: tudo que elas leem vem do índice
+        Index(
+            "ix_speech_slot_covering", "debate_id", "position", "sequence_in_team",
+            postgresql_include=["score", "edition_member_id"],
+        ),
+    )
+
+# ----------------------------
+# Juízes do debate
+# ----------------------------
+
+JudgeRoleEnum = Enum("chair", "wing", name="judge_role_enum")
+
+class DebateJudge(Base):
+    __tablename__ = "debate_judges"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    debate_id: Mapped[int] = mapped_column(ForeignKey("debates.id", ondelete="CASCADE"), nullable=False, index=True)
+    edition_member_id: Mapped[int] = mapped_column(ForeignKey("edition_members.id", ondelete="RESTRICT"), nullable=False, index=True)
+    role: Mapped[str] = mapped_column(JudgeRoleEnum, nullable=False)  # chair | wing
+
+    debate: Mapped["Debate"] = relationship(back_populates="judges")
+    judge: Mapped["EditionMember"] = relationship()
+
+    __table_args__ = (
+        UniqueConstraint("debate_id", "edition_member_id", name="uq_judge_once_per_debate"),
+        # busca de chair/wings por debate
+        Index("ix_judge_debate_role", "debate_id", "role"),
+    )